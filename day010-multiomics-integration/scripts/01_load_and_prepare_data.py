@@ -10,21 +10,29 @@ Input:
     
 Output:
     - Prints summary statistics
-    - Aligned datasets stored in memory for downstream analysis
+    - results/mg_genes_aligned.parquet
+    - results/mtx_transcripts_aligned.parquet
     
 What it does:
     1. Loads MG and MTX count tables
     2. Identifies common genes between datasets
     3. Filters to keep only shared genes
     4. Reports dataset dimensions and overlap
+    
+Note: counts are cast to float32 on load and stay float32 through CPM and
+ratio calculation.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 
+from io_utils import read_tsv, write_table
+
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 8)
@@ -34,15 +42,20 @@ def main():
     print("STEP 1: LOADING AND PREPARING DATA")
     print("=" * 70)
     
-    # Load metagenomics gene abundance table
-    print("\n[1/4] Loading metagenomics data...")
-    mg_genes = pd.read_csv('data/gene_abundance_table.tsv', sep='\t', index_col=0)
-    print(f"      Metagenomics: {mg_genes.shape[0]} genes × {mg_genes.shape[1]} samples")
+    # Start both (independent) table reads at once so disk I/O and parsing overlap
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        mg_future = pool.submit(read_tsv, 'data/gene_abundance_table.tsv')
+        mtx_future = pool.submit(read_tsv, 'data/transcript_counts.tsv')
     
-    # Load metatranscriptomics transcript counts
-    print("\n[2/4] Loading metatranscriptomics data...")
-    mtx_transcripts = pd.read_csv('data/transcript_counts.tsv', sep='\t', index_col=0)
-    print(f"      Metatranscriptomics: {mtx_transcripts.shape[0]} transcripts × {mtx_transcripts.shape[1]} samples")
+        # Load metagenomics gene abundance table
+        print("\n[1/4] Loading metagenomics data...")
+        mg_genes = mg_future.result().astype(np.float32)
+        print(f"      Metagenomics: {mg_genes.shape[0]} genes × {mg_genes.shape[1]} samples")
+    
+        # Load metatranscriptomics transcript counts
+        print("\n[2/4] Loading metatranscriptomics data...")
+        mtx_transcripts = mtx_future.result().astype(np.float32)
+        print(f"      Metatranscriptomics: {mtx_transcripts.shape[0]} transcripts × {mtx_transcripts.shape[1]} samples")
     
     # Check sample names
     print("\n[3/4] Checking sample names...")
@@ -51,17 +64,25 @@ def main():
     
     # Align gene IDs (keep only common genes)
     print("\n[4/4] Aligning gene IDs...")
-    common_genes = mg_genes.index.intersection(mtx_transcripts.index)
-    print(f"      Common genes between MG and MTX: {len(common_genes)}")
-    print(f"      MG-specific genes: {len(mg_genes.index) - len(common_genes)}")
-    print(f"      MTX-specific genes: {len(mtx_transcripts.index) - len(common_genes)}")
+    n_mg_genes, n_mtx_genes = len(mg_genes.index), len(mtx_transcripts.index)
+    
+    # Store gene IDs as categoricals over one shared dictionary: the index
+    # becomes int codes, and equal dtypes let align() match codes directly
+    gene_dtype = pd.CategoricalDtype(mg_genes.index.union(mtx_transcripts.index))
+    mg_genes.index = pd.CategoricalIndex(mg_genes.index, dtype=gene_dtype, name=mg_genes.index.name)
+    mtx_transcripts.index = pd.CategoricalIndex(mtx_transcripts.index, dtype=gene_dtype, name=mtx_transcripts.index.name)
     
-    mg_genes = mg_genes.loc[common_genes]
-    mtx_transcripts = mtx_transcripts.loc[common_genes]
+    mg_genes, mtx_transcripts = mg_genes.align(mtx_transcripts, join='inner', axis=0)
+    mg_genes.index = mg_genes.index.remove_unused_categories()
+    mtx_transcripts.index = mtx_transcripts.index.remove_unused_categories()
+    n_common = len(mg_genes.index)
+    print(f"      Common genes between MG and MTX: {n_common}")
+    print(f"      MG-specific genes: {n_mg_genes - n_common}")
+    print(f"      MTX-specific genes: {n_mtx_genes - n_common}")
     
     # Save aligned data
-    mg_genes.to_csv('results/mg_genes_aligned.csv')
-    mtx_transcripts.to_csv('results/mtx_transcripts_aligned.csv')
+    write_table(mg_genes, 'results/mg_genes_aligned.parquet')
+    write_table(mtx_transcripts, 'results/mtx_transcripts_aligned.parquet')
     
     print("\n✓ Data loading and preparation complete!")
     print(f"✓ Aligned datasets saved to results/ directory")
@@ -5,12 +5,12 @@ Description: Normalizes metagenomics and metatranscriptomics count data to
              CPM (counts per million) for fair comparison across samples.
              
 Input:
-    - results/mg_genes_aligned.csv
-    - results/mtx_transcripts_aligned.csv
+    - results/mg_genes_aligned.parquet
+    - results/mtx_transcripts_aligned.parquet
     
 Output:
-    - results/mg_genes_cpm.csv
-    - results/mtx_transcripts_cpm.csv
+    - results/mg_genes_cpm.parquet
+    - results/mtx_transcripts_cpm.parquet
     
 What it does:
     1. Loads aligned count matrices
@@ -21,6 +21,25 @@ What it does:
 
 import pandas as pd
 import numpy as np
+from numba import njit, prange
+
+from io_utils import read_table, write_table
+
+@njit(parallel=True)
+def _cpm_kernel(x):
+    """
+    Scale each column of x to sum to 1e6, in place (one pass per column).
+    
+    A zero-total column relies on IEEE semantics (1e6 / 0 -> inf,
+    0 * inf -> NaN), so this kernel must not be compiled with fastmath.
+    """
+    for j in prange(x.shape[1]):
+        total = 0.0
+        for i in range(x.shape[0]):
+            total += x[i, j]
+        inv = 1e6 / total
+        for i in range(x.shape[0]):
+            x[i, j] *= inv
 
 def normalize_cpm(df):
     """
@@ -28,15 +47,23 @@ def normalize_cpm(df):
     
     Formula: CPM = (count / total_counts_in_sample) × 1,000,000
     
+    Values are computed in float32: CPM does not need float64 precision and
+    the smaller dtype halves memory traffic on large count tables. Columns are
+    cast straight into one Fortran-order float32 output buffer, which is then
+    scaled in place, so no full-size temporary (consolidated, cast or
+    df / totals) table is ever allocated.
+    
     Args:
         df: DataFrame with genes as rows, samples as columns
         
     Returns:
         DataFrame with CPM-normalized values
     """
-    totals = df.sum(axis=0)
-    cpm = (df / totals) * 1e6
-    return cpm
+    arr = np.empty(df.shape, dtype=np.float32, order='F')
+    for j in range(df.shape[1]):
+        arr[:, j] = df.iloc[:, j].to_numpy()
+    _cpm_kernel(arr)
+    return pd.DataFrame(arr, index=df.index, columns=df.columns)
 
 def main():
     print("=" * 70)
@@ -45,8 +72,8 @@ def main():
     
     # Load aligned data
     print("\n[1/4] Loading aligned count data...")
-    mg_genes = pd.read_csv('results/mg_genes_aligned.csv', index_col=0)
-    mtx_transcripts = pd.read_csv('results/mtx_transcripts_aligned.csv', index_col=0)
+    mg_genes = read_table('results/mg_genes_aligned.parquet')
+    mtx_transcripts = read_table('results/mtx_transcripts_aligned.parquet')
     
     print(f"      Loaded {mg_genes.shape[0]} genes, {mg_genes.shape[1]} samples")
     
@@ -65,8 +92,12 @@ def main():
     
     # Normalize both datasets
     print("\n[3/4] Normalizing to CPM...")
+    # Raw counts are not needed after this point, so each raw table is
+    # released as soon as its CPM copy exists (lower peak memory)
     mg_cpm = normalize_cpm(mg_genes)
+    del mg_genes
     mtx_cpm = normalize_cpm(mtx_transcripts)
+    del mtx_transcripts
     
     # Validate normalization
     print("\n[4/4] Validating normalization...")
@@ -77,8 +108,8 @@ def main():
     print(f"      MTX CPM totals: {mtx_totals.min():.0f} - {mtx_totals.max():.0f} (should all be ~1,000,000)")
     
     # Save normalized data
-    mg_cpm.to_csv('results/mg_genes_cpm.csv')
-    mtx_cpm.to_csv('results/mtx_transcripts_cpm.csv')
+    write_table(mg_cpm, 'results/mg_genes_cpm.parquet')
+    write_table(mtx_cpm, 'results/mtx_transcripts_cpm.parquet')
     
     print("\n✓ Normalization complete!")
     print(f"✓ Normalized data saved to results/ directory")
@@ -6,11 +6,11 @@ Description: Calculates RNA/DNA expression ratios for each gene to identify
              their genomic abundance.
              
 Input:
-    - results/mg_genes_cpm.csv (normalized DNA abundance)
-    - results/mtx_transcripts_cpm.csv (normalized RNA abundance)
+    - results/mg_genes_cpm.parquet (normalized DNA abundance)
+    - results/mtx_transcripts_cpm.parquet (normalized RNA abundance)
     
 Output:
-    - results/expression_ratios.csv
+    - results/expression_ratios.parquet
     - results/highly_expressed_genes.csv
     - results/under_expressed_genes.csv
     
@@ -22,9 +22,13 @@ What it does:
     5. Saves results for visualization
 """
 
+import dask
 import pandas as pd
 import numpy as np
 
+from io_utils import write_table
+from lazy_data import mg_cpm as lazy_mg_cpm, mtx_cpm as lazy_mtx_cpm
+
 def main():
     print("=" * 70)
     print("STEP 3: CALCULATING EXPRESSION RATIOS")
@@ -32,16 +36,19 @@ def main():
     
     # Load normalized data
     print("\n[1/5] Loading normalized data...")
-    mg_cpm = pd.read_csv('results/mg_genes_cpm.csv', index_col=0)
-    mtx_cpm = pd.read_csv('results/mtx_transcripts_cpm.csv', index_col=0)
+    # Both tables are materialized in one parallel compute
+    mg_cpm, mtx_cpm = dask.compute(lazy_mg_cpm(), lazy_mtx_cpm())
     
-    common_genes = mg_cpm.index.intersection(mtx_cpm.index)
+    mg_cpm, mtx_cpm = mg_cpm.align(mtx_cpm, join='inner', axis=0)
+    common_genes = mg_cpm.index
     print(f"      Processing {len(common_genes)} common genes")
     
     # Match MG and MTX samples (assuming they have corresponding names)
     print("\n[2/5] Matching sample pairs...")
-    mg_samples = [col for col in mg_cpm.columns if 'MG' in col]
-    mtx_samples = [col.replace('MG', 'MTX') for col in mg_samples]
+    cols = mg_cpm.columns.to_series()
+    mg_cols = cols[cols.str.contains('MG', regex=False)]
+    mg_samples = mg_cols.tolist()
+    mtx_samples = mg_cols.str.replace('MG', 'MTX', regex=False).tolist()
     print(f"      Found {len(mg_samples)} sample pairs")
     
     # Calculate RNA/DNA ratios for each sample pair
@@ -49,46 +56,61 @@ def main():
     pseudocount = 1
     
     print("\n[3/5] Calculating log2(RNA/DNA) ratios...")
-    expression_ratios = pd.DataFrame(index=common_genes)
-    
-    for mg_col, mtx_col in zip(mg_samples, mtx_samples):
-        sample_id = mg_col.replace('_MG', '')
-        expression_ratios[sample_id] = np.log2(
-            (mtx_cpm[mtx_col] + pseudocount) / (mg_cpm[mg_col] + pseudocount)
-        )
+    # Column i of each matrix is the same sample, so the whole ratio
+    # matrix is computed in one vectorized pass
+    mg_aligned = mg_cpm[mg_samples].to_numpy(dtype=np.float32)
+    mtx_aligned = mtx_cpm[mtx_samples].to_numpy(dtype=np.float32)
+    ratios = np.log2((mtx_aligned + pseudocount) / (mg_aligned + pseudocount))
+    
+    expression_ratios = pd.DataFrame(
+        ratios,
+        index=common_genes,
+        columns=mg_cols.str.replace('_MG', '', regex=False).tolist(),
+    )
     
     # Calculate mean expression ratio across samples
-    expression_ratios['Mean_Log2_Ratio'] = expression_ratios.mean(axis=1)
-    expression_ratios['StdDev'] = expression_ratios.iloc[:, :-1].std(axis=1)
+    expression_ratios[['Mean_Log2_Ratio', 'StdDev']] = np.column_stack(
+        [ratios.mean(axis=1), ratios.std(axis=1, ddof=1)]
+    )
     
     # Save results
-    expression_ratios.to_csv('results/expression_ratios.csv')
+    write_table(expression_ratios, 'results/expression_ratios.parquet')
     
     # Summary statistics
     print("\n[4/5] Computing summary statistics...")
-    highly_expressed_count = (expression_ratios['Mean_Log2_Ratio'] > 2).sum()
-    moderately_expressed_count = (
-        (expression_ratios['Mean_Log2_Ratio'] > 0) & 
-        (expression_ratios['Mean_Log2_Ratio'] < 2)
-    ).sum()
-    under_expressed_count = (expression_ratios['Mean_Log2_Ratio'] < 0).sum()
+    m = expression_ratios['Mean_Log2_Ratio'].to_numpy()
+    
+    # Sort once; every threshold count is then a binary search on the
+    # sorted ratios, and the same order serves the median and both
+    # extreme-gene selections below. argsort puts NaN ratios (genes from a
+    # zero-depth sample) last, so only the first n_valid entries are used
+    order = np.argsort(m)
+    n_valid = np.count_nonzero(~np.isnan(m))
+    sorted_m = m[order][:n_valid]
+    lo_end = np.searchsorted(sorted_m, -2.0, side='left')    # m < -2
+    zero_start = np.searchsorted(sorted_m, 0.0, side='left')  # m < 0
+    zero_end = np.searchsorted(sorted_m, 0.0, side='right')   # m <= 0
+    two_start = np.searchsorted(sorted_m, 2.0, side='left')   # m < 2
+    hi_start = np.searchsorted(sorted_m, 2.0, side='right')   # m <= 2
+    
+    highly_expressed_count = n_valid - hi_start
+    moderately_expressed_count = two_start - zero_end
+    under_expressed_count = zero_start
+    median_ratio = ((sorted_m[(n_valid - 1) // 2] + sorted_m[n_valid // 2]) / 2
+                    if n_valid else np.nan)
     
     print(f"\nExpression Ratio Summary:")
     print(f"  Highly expressed genes (log2 ratio > 2):    {highly_expressed_count:6d} ({highly_expressed_count/len(common_genes)*100:5.1f}%)")
     print(f"  Moderately expressed (0 < log2 ratio < 2):  {moderately_expressed_count:6d} ({moderately_expressed_count/len(common_genes)*100:5.1f}%)")
     print(f"  Under-expressed (log2 ratio < 0):           {under_expressed_count:6d} ({under_expressed_count/len(common_genes)*100:5.1f}%)")
-    print(f"  Mean expression ratio: {expression_ratios['Mean_Log2_Ratio'].mean():.2f}")
-    print(f"  Median expression ratio: {expression_ratios['Mean_Log2_Ratio'].median():.2f}")
+    print(f"  Mean expression ratio: {m.mean():.2f}")
+    print(f"  Median expression ratio: {median_ratio:.2f}")
     
     # Extract genes with extreme expression patterns
     print("\n[5/5] Identifying genes with extreme expression...")
-    highly_expressed = expression_ratios[
-        expression_ratios['Mean_Log2_Ratio'] > 2
-    ].sort_values('Mean_Log2_Ratio', ascending=False)
+    highly_expressed = expression_ratios.iloc[order[hi_start:n_valid][::-1]]
     
-    under_expressed = expression_ratios[
-        expression_ratios['Mean_Log2_Ratio'] < -2
-    ].sort_values('Mean_Log2_Ratio')
+    under_expressed = expression_ratios.iloc[order[:lo_end]]
     
     print(f"\nTop 10 Highly Expressed Genes:")
     print(highly_expressed.head(10)[['Mean_Log2_Ratio', 'StdDev']])
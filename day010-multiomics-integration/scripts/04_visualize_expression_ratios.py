@@ -6,9 +6,9 @@ Description: Creates publication-quality visualizations of expression ratios
              gene expression patterns across samples.
              
 Input:
-    - results/expression_ratios.csv
-    - results/mg_genes_cpm.csv
-    - results/mtx_transcripts_cpm.csv
+    - results/expression_ratios.parquet
+    - results/mg_genes_cpm.parquet
+    - results/mtx_transcripts_cpm.parquet
     
 Output:
     - figures/expression_ratio_histogram.png
@@ -21,10 +21,13 @@ What it does:
     3. Boxplot: expression ratio variability across samples
 """
 
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+import dask
+
+from io_utils import read_table
+from lazy_data import mg_cpm, mtx_cpm
 
 # Set style
 sns.set_style("whitegrid")
@@ -37,9 +40,7 @@ def main():
     
     # Load data
     print("\n[1/4] Loading data...")
-    expression_ratios = pd.read_csv('results/expression_ratios.csv', index_col=0)
-    mg_cpm = pd.read_csv('results/mg_genes_cpm.csv', index_col=0)
-    mtx_cpm = pd.read_csv('results/mtx_transcripts_cpm.csv', index_col=0)
+    expression_ratios = read_table('results/expression_ratios.parquet')
     
     print(f"      Loaded {len(expression_ratios)} genes")
     
@@ -61,7 +62,10 @@ def main():
     
     # 2. MA plot (mean abundance vs expression ratio)
     print("\n[3/4] Creating MA plot...")
-    mean_abundance = (mg_cpm.mean(axis=1) + mtx_cpm.mean(axis=1)) / 2
+    # Only per-gene means are needed, so the CPM tables are reduced
+    # partition by partition instead of being loaded whole
+    mg_mean, mtx_mean = dask.compute(mg_cpm().mean(axis=1), mtx_cpm().mean(axis=1))
+    mean_abundance = (mg_mean + mtx_mean) / 2
     
     plt.figure(figsize=(10, 6))
     plt.scatter(np.log10(mean_abundance + 1), 
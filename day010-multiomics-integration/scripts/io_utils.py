@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script: io_utils.py
+Description: Shared helpers for reading and writing the intermediate tables
+             passed between the gene-level integration scripts (01-04).
+
+What it does:
+    1. Dispatches on file suffix (.parquet or .csv)
+    2. Stores intermediates as snappy-compressed Parquet, which loads much
+       faster than CSV and keeps the gene ID index and dtypes intact
+    3. Parses the raw TSV count tables with the multi-threaded Arrow reader
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.csv as pa_csv
+
+
+def read_tsv(path):
+    """
+    Load a tab-separated count table with the Arrow CSV reader
+
+    Args:
+        path: Path to a TSV file whose first column holds the gene IDs
+
+    Returns:
+        DataFrame indexed by the first column
+    """
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        parse_options=pa_csv.ParseOptions(delimiter='\t'),
+    )
+    index_col = table.column_names[0]
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    return df.set_index(index_col)
+
+
+def read_table(path):
+    """
+    Load a gene × sample table written by write_table()
+
+    Args:
+        path: Path to a .parquet or .csv file
+
+    Returns:
+        DataFrame with gene IDs as the index
+    """
+    if Path(path).suffix == '.parquet':
+        return pd.read_parquet(path, engine='pyarrow')
+    return pd.read_csv(path, index_col=0)
+
+
+def write_table(df, path):
+    """
+    Save a gene × sample table, keeping the gene ID index
+
+    Args:
+        df: DataFrame with genes as rows, samples as columns
+        path: Destination .parquet or .csv file
+    """
+    if Path(path).suffix == '.parquet':
+        df.to_parquet(path, compression='snappy', engine='pyarrow')
+    else:
+        df.to_csv(path)
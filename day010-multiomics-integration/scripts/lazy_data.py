@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Script: lazy_data.py
+Description: Lazily loaded, memoized handles on the CPM tables written by
+             02_normalize_data.py, shared by scripts 03 and 04.
+
+What it does:
+    1. Opens each Parquet CPM table as a Dask DataFrame (nothing is read yet)
+    2. Caches the handle, so repeated calls in one session reuse it
+    3. Callers decide what to materialize: .compute() for the full table,
+       or a reduction such as .mean(axis=1).compute() that streams over
+       partitions and never holds the whole matrix in memory
+"""
+
+from functools import lru_cache
+
+import dask.dataframe as dd
+
+MG_CPM_PATH = 'results/mg_genes_cpm.parquet'
+MTX_CPM_PATH = 'results/mtx_transcripts_cpm.parquet'
+
+
+@lru_cache(maxsize=None)
+def mg_cpm():
+    """Lazy handle on the metagenomics CPM table (genes × MG samples)"""
+    return dd.read_parquet(MG_CPM_PATH)
+
+
+@lru_cache(maxsize=None)
+def mtx_cpm():
+    """Lazy handle on the metatranscriptomics CPM table (genes × MTX samples)"""
+    return dd.read_parquet(MTX_CPM_PATH)
@@ -4,10 +4,12 @@ dna_vs_rna_heatmap_comparison_toy.py
 
 What this script does
 1) Generates *toy* input files (if they don't already exist):
-   - results/mg_genes_cpm.csv
-   - results/mtx_transcripts_cpm.csv
+   - results/mg_genes_cpm.parquet
+   - results/mtx_transcripts_cpm.parquet
    - results/deseq2_significant_genes.csv
+   (set TOY_EXPORT_CSV=1 to also write CSV copies of the CPM tables)
 2) Creates a side-by-side DNA vs RNA heatmap for the top 50 "significant" genes
+   (only those rows are read from the Parquet CPM tables)
 3) Saves:
    - figures/dna_vs_rna_heatmap_comparison.png
 """
@@ -15,6 +17,9 @@ What this script does
 import os
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+import matplotlib
+matplotlib.use("Agg")  # file output only; no GUI backend needed
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -25,16 +30,23 @@ def ensure_dirs():
     os.makedirs("results", exist_ok=True)
     os.makedirs("figures", exist_ok=True)
 
-def zscore_rows(df: pd.DataFrame) -> pd.DataFrame:
-    """Row-wise z-score (per gene), safe for constant rows."""
-    mu = df.mean(axis=1)
-    sd = df.std(axis=1).replace(0, np.nan)
-    z = df.sub(mu, axis=0).div(sd, axis=0).fillna(0.0)
-    return z
+def zscore_rows(a: np.ndarray) -> np.ndarray:
+    """Row-wise z-score (per gene) of a genes × samples array, safe for constant rows."""
+    a = np.asarray(a, dtype=np.float32)
+    mu = a.mean(axis=1, keepdims=True)
+    sd = a.std(axis=1, ddof=1, keepdims=True)
+    sd[sd == 0] = 1.0  # constant rows -> z = 0
+    return (a - mu) / sd
+
+def read_cpm_rows(fp, genes) -> pd.DataFrame:
+    """Read only the given gene rows from a Parquet CPM table (row-group filter)."""
+    index_col = pq.read_schema(fp).pandas_metadata["index_columns"][0]
+    table = pq.read_table(fp, filters=[(index_col, "in", list(genes))])
+    return table.to_pandas()
 
 def generate_toy_inputs(
-    mg_fp="results/mg_genes_cpm.csv",
-    mtx_fp="results/mtx_transcripts_cpm.csv",
+    mg_fp="results/mg_genes_cpm.parquet",
+    mtx_fp="results/mtx_transcripts_cpm.parquet",
     sig_fp="results/deseq2_significant_genes.csv",
     n_genes=1200,
     n_samples=10,
@@ -66,15 +78,15 @@ def generate_toy_inputs(
     mtx = mtx_base @ sample_effect_mt
 
     # Sprinkle a few zeros (dropouts)
-    mg[rng.random(mg.shape) < 0.03] = 0.0
-    mtx[rng.random(mtx.shape) < 0.04] = 0.0
+    mg[rng.random(mg.shape, dtype=np.float32) < 0.03] = 0.0
+    mtx[rng.random(mtx.shape, dtype=np.float32) < 0.04] = 0.0
 
-    mg_df = pd.DataFrame(mg, index=genes, columns=samples)
-    mtx_df = pd.DataFrame(mtx, index=genes, columns=samples)
+    mg_mean = mg.mean(axis=1)
+    mtx_mean = mtx.mean(axis=1)
 
     # --- Toy "DESeq2 significant genes" table ---
     # Create pseudo log2FC/padj and pick some genes as "significant"
-    log2_ratio = np.log2((mtx_df.mean(axis=1) + 1.0) / (mg_df.mean(axis=1) + 1.0))
+    log2_ratio = np.log2((mtx_mean + 1.0) / (mg_mean + 1.0))
 
     # Select some "true" DE genes (up & down), then add noise
     n_de = max(60, int(0.08 * n_genes))
@@ -83,19 +95,19 @@ def generate_toy_inputs(
     down_idx = de_idx[n_de // 2 :]
 
     log2fc = log2_ratio.copy()
-    log2fc.iloc[up_idx] += rng.normal(loc=2.2, scale=0.4, size=len(up_idx))
-    log2fc.iloc[down_idx] += rng.normal(loc=-2.0, scale=0.4, size=len(down_idx))
+    log2fc[up_idx] += rng.normal(loc=2.2, scale=0.4, size=len(up_idx))
+    log2fc[down_idx] += rng.normal(loc=-2.0, scale=0.4, size=len(down_idx))
     log2fc += rng.normal(loc=0.0, scale=0.3, size=n_genes)
 
     # Fake adjusted p-values: smaller for larger |log2FC|
-    strength = np.abs(log2fc.values)
+    strength = np.abs(log2fc)
     padj = np.exp(-strength)  # not real stats; just toy behavior
     padj = np.clip(padj, 1e-12, 1.0)
 
     sig = pd.DataFrame(
         {
-            "baseMean": (mg_df.mean(axis=1) + mtx_df.mean(axis=1)) / 2.0,
-            "log2FoldChange": log2fc.values,
+            "baseMean": (mg_mean + mtx_mean) / 2.0,
+            "log2FoldChange": log2fc,
             "padj": padj,
         },
         index=genes,
@@ -105,10 +117,15 @@ def generate_toy_inputs(
     sig = sig[(sig["padj"] < 0.05) & (np.abs(sig["log2FoldChange"]) > 1)]
     sig = sig.sort_values("padj")
 
-    # Save
-    mg_df.to_csv(mg_fp)
-    mtx_df.to_csv(mtx_fp)
+    # Save (DataFrames wrap the arrays only for the Parquet/CSV writers)
+    mg_df = pd.DataFrame(mg, index=genes, columns=samples)
+    mtx_df = pd.DataFrame(mtx, index=genes, columns=samples)
+    mg_df.to_parquet(mg_fp)
+    mtx_df.to_parquet(mtx_fp)
     sig.to_csv(sig_fp)
+    if os.environ.get("TOY_EXPORT_CSV"):
+        mg_df.to_csv(os.path.splitext(mg_fp)[0] + ".csv")
+        mtx_df.to_csv(os.path.splitext(mtx_fp)[0] + ".csv")
 
     print(f"  ✓ Wrote: {mg_fp}")
     print(f"  ✓ Wrote: {mtx_fp}")
@@ -127,67 +144,59 @@ def main():
     generate_toy_inputs()
 
     # 2) Load data
-    mg_cpm = pd.read_csv("results/mg_genes_cpm.csv", index_col=0)
-    mtx_cpm = pd.read_csv("results/mtx_transcripts_cpm.csv", index_col=0)
     sig_genes = pd.read_csv("results/deseq2_significant_genes.csv", index_col=0)
 
     if sig_genes.shape[0] == 0:
         raise SystemExit("No significant genes found in results/deseq2_significant_genes.csv (toy or real).")
 
-    # Select top 50 genes by adjusted p-value (row order)
-    top_genes = sig_genes.index[:50].tolist()
+    # Select top 50 genes by adjusted p-value (partial selection, then only
+    # the selected rows are sorted; the table order does not matter)
+    padj = sig_genes["padj"].to_numpy()
+    k = min(50, padj.size)
+    top_idx = np.argpartition(padj, k - 1)[:k]
+    top_genes = sig_genes.index[top_idx[np.argsort(padj[top_idx], kind="stable")]].tolist()
+
+    # Read just these rows from the CPM tables
+    mg_cpm = read_cpm_rows("results/mg_genes_cpm.parquet", top_genes)
+    mtx_cpm = read_cpm_rows("results/mtx_transcripts_cpm.parquet", top_genes)
 
     # Filter data for these genes (keep only genes that exist in CPM tables)
-    top_genes = [g for g in top_genes if g in mg_cpm.index and g in mtx_cpm.index]
+    top_genes = pd.Index(top_genes).intersection(mg_cpm.index).intersection(mtx_cpm.index).tolist()
     if len(top_genes) == 0:
         raise SystemExit("Top genes not found in CPM matrices. Check gene IDs match across files.")
 
     mg_top = mg_cpm.loc[top_genes]
     mtx_top = mtx_cpm.loc[top_genes]
 
-    # Log transform
-    mg_log = np.log2(mg_top + 1.0)
-    mtx_log = np.log2(mtx_top + 1.0)
+    # Log transform (plain arrays from here on; labels are passed to the plot)
+    mg_log = np.log2(mg_top.to_numpy() + 1.0)
+    mtx_log = np.log2(mtx_top.to_numpy() + 1.0)
 
     # Z-score per gene (row-wise)
     mg_scaled = zscore_rows(mg_log)
     mtx_scaled = zscore_rows(mtx_log)
 
-    # 3) Plot side-by-side heatmaps
+    # 3) Plot side-by-side heatmaps (imshow: one image per panel, no per-cell mesh)
     sns.set_style("white")
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 12))
-
-    sns.heatmap(
-        mg_scaled,
-        cmap="RdBu_r",
-        center=0,
-        vmin=-2,
-        vmax=2,
-        cbar_kws={"label": "Z-score"},
-        yticklabels=True,
-        xticklabels=True,
-        ax=ax1,
-    )
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 12), layout="constrained")
+
+    im = ax1.imshow(mg_scaled, cmap="RdBu_r", vmin=-2, vmax=2, aspect="auto", interpolation="nearest")
+    ax1.set_yticks(range(len(top_genes)), labels=top_genes)
+    ax1.set_xticks(range(mg_top.shape[1]), labels=mg_top.columns.tolist())
     ax1.set_title("Metagenomic Gene Abundance (DNA)", fontsize=14, fontweight="bold")
     ax1.set_xlabel("Samples", fontsize=12)
     ax1.set_ylabel("Genes", fontsize=12)
 
-    sns.heatmap(
-        mtx_scaled,
-        cmap="RdBu_r",
-        center=0,
-        vmin=-2,
-        vmax=2,
-        cbar_kws={"label": "Z-score"},
-        yticklabels=True,
-        xticklabels=True,
-        ax=ax2,
-    )
+    ax2.imshow(mtx_scaled, cmap="RdBu_r", vmin=-2, vmax=2, aspect="auto", interpolation="nearest")
+    ax2.set_yticks(range(len(top_genes)), labels=top_genes)
+    ax2.set_xticks(range(mtx_top.shape[1]), labels=mtx_top.columns.tolist())
     ax2.set_title("Metatranscriptomic Expression (RNA)", fontsize=14, fontweight="bold")
     ax2.set_xlabel("Samples", fontsize=12)
     ax2.set_ylabel("")
 
-    plt.tight_layout()
+    # Both panels share cmap and limits, so one colorbar covers them
+    fig.colorbar(im, ax=[ax1, ax2], label="Z-score")
+
     out_fp = "figures/dna_vs_rna_heatmap_comparison.png"
     plt.savefig(out_fp, dpi=300, bbox_inches="tight")
     plt.close()
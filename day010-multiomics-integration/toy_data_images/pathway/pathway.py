@@ -6,8 +6,9 @@ Outputs to:
  /home/jojy-john/Jojy_Research_Sync/website_assets/projects/metagenome-analysis-series/day10-multiomics-integration/toy_data_images/
 
 Creates:
- - data/mg_pathway_abundance.tsv
- - data/mtx_pathway_abundance.tsv
+ - data/mg_pathway_abundance.npz
+ - data/mtx_pathway_abundance.npz
+   (set TOY_EXPORT_CSV=1 to also write the .tsv versions)
  - results/pathway_expression_ratios.csv
  - pathway_activity_comparison.png
 """
@@ -28,8 +29,18 @@ RESULTS_DIR = os.path.join(BASE_DIR, "results")
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
-MG_FP = os.path.join(DATA_DIR, "mg_pathway_abundance.tsv")
-MTX_FP = os.path.join(DATA_DIR, "mtx_pathway_abundance.tsv")
+MG_FP = os.path.join(DATA_DIR, "mg_pathway_abundance.npz")
+MTX_FP = os.path.join(DATA_DIR, "mtx_pathway_abundance.npz")
+
+# ============================================================
+# Toy data cache (raw NumPy arrays, no CSV round-trip)
+# ============================================================
+def save_npz_table(fp, values, index, columns):
+    np.savez_compressed(fp, values=values, index=np.array(index), columns=np.array(columns))
+
+def load_npz_table(fp):
+    with np.load(fp) as z:
+        return pd.DataFrame(z["values"], index=z["index"], columns=z["columns"])
 
 # ============================================================
 # Generate Toy Data (if missing)
@@ -65,11 +76,14 @@ def generate_toy_pathway_data(n_pathways=150, n_samples=8, seed=7):
     mtx[active_idx] *= 4   # highly expressed
     mtx[inactive_idx] *= 0.25  # repressed
 
-    mg_df = pd.DataFrame(mg, index=pathways, columns=samples)
-    mtx_df = pd.DataFrame(mtx, index=pathways, columns=samples)
+    save_npz_table(MG_FP, mg, pathways, samples)
+    save_npz_table(MTX_FP, mtx, pathways, samples)
 
-    mg_df.to_csv(MG_FP, sep="\t")
-    mtx_df.to_csv(MTX_FP, sep="\t")
+    if os.environ.get("TOY_EXPORT_CSV"):
+        pd.DataFrame(mg, index=pathways, columns=samples).to_csv(
+            os.path.join(DATA_DIR, "mg_pathway_abundance.tsv"), sep="\t")
+        pd.DataFrame(mtx, index=pathways, columns=samples).to_csv(
+            os.path.join(DATA_DIR, "mtx_pathway_abundance.tsv"), sep="\t")
 
     print("✓ Toy pathway files written.")
 
@@ -81,8 +95,8 @@ def main():
     generate_toy_pathway_data()
 
     # Load pathway abundances
-    mg_pathways = pd.read_csv(MG_FP, sep='\t', index_col=0)
-    mtx_pathways = pd.read_csv(MTX_FP, sep='\t', index_col=0)
+    mg_pathways = load_npz_table(MG_FP)
+    mtx_pathways = load_npz_table(MTX_FP)
 
     # Normalize to CPM
     mg_pathways_cpm = (mg_pathways / mg_pathways.sum(axis=0)) * 1e6
@@ -92,18 +106,16 @@ def main():
     common_pathways = mg_pathways_cpm.index.intersection(mtx_pathways_cpm.index)
     print(f"Common pathways: {len(common_pathways)}")
 
-    # Calculate pathway expression ratios
-    pathway_ratios = pd.DataFrame()
-
-    for pathway in common_pathways:
-        mg_mean = mg_pathways_cpm.loc[pathway].mean()
-        mtx_mean = mtx_pathways_cpm.loc[pathway].mean()
+    # Calculate pathway expression ratios (all pathways at once)
+    mg_mean = mg_pathways_cpm.loc[common_pathways].mean(axis=1)
+    mtx_mean = mtx_pathways_cpm.loc[common_pathways].mean(axis=1)
 
-        if mg_mean > 0:
-            ratio = np.log2((mtx_mean + 1) / (mg_mean + 1))
-            pathway_ratios.loc[pathway, 'Log2_Ratio'] = ratio
-            pathway_ratios.loc[pathway, 'Mean_DNA'] = mg_mean
-            pathway_ratios.loc[pathway, 'Mean_RNA'] = mtx_mean
+    mask = mg_mean > 0
+    pathway_ratios = pd.DataFrame({
+        'Log2_Ratio': np.log2((mtx_mean[mask] + 1) / (mg_mean[mask] + 1)),
+        'Mean_DNA': mg_mean[mask],
+        'Mean_RNA': mtx_mean[mask],
+    })
 
     pathway_ratios = pathway_ratios.sort_values('Log2_Ratio', ascending=False)
 
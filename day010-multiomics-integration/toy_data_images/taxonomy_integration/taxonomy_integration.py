@@ -4,8 +4,9 @@ Toy Taxonomic Integration (DNA vs RNA activity)
 
 Self-contained script:
 - Generates toy taxonomy abundance tables if missing:
-    data/mg_taxonomy_abundance.tsv
-    data/mtx_taxonomy_abundance.tsv
+    data/mg_taxonomy_abundance.parquet
+    data/mtx_taxonomy_abundance.parquet
+  (set TOY_EXPORT_CSV=1 to also write .tsv copies)
 - Runs your activity-score analysis
 - Saves outputs to your requested path:
 
@@ -20,6 +21,8 @@ Creates:
 import os
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # file output only; no GUI backend needed
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -35,8 +38,8 @@ os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(RESULTS_DIR, exist_ok=True)
 os.makedirs(FIG_DIR, exist_ok=True)
 
-MG_FP = os.path.join(DATA_DIR, "mg_taxonomy_abundance.tsv")
-MTX_FP = os.path.join(DATA_DIR, "mtx_taxonomy_abundance.tsv")
+MG_FP = os.path.join(DATA_DIR, "mg_taxonomy_abundance.parquet")
+MTX_FP = os.path.join(DATA_DIR, "mtx_taxonomy_abundance.parquet")
 
 # ============================================================
 # Toy data generator (only if missing)
@@ -92,14 +95,17 @@ def generate_toy_taxa(n_taxa=120, n_samples=8, seed=11):
     mtx[abundant_inactive, :] *= 0.35
 
     # sprinkle zeros (dropouts)
-    mg[rng.random(mg.shape) < 0.02] = 0.0
-    mtx[rng.random(mtx.shape) < 0.03] = 0.0
+    mg[rng.random(mg.shape, dtype=np.float32) < 0.02] = 0.0
+    mtx[rng.random(mtx.shape, dtype=np.float32) < 0.03] = 0.0
 
     mg_df = pd.DataFrame(mg, index=taxa, columns=samples)
     mtx_df = pd.DataFrame(mtx, index=taxa, columns=samples)
 
-    mg_df.to_csv(MG_FP, sep="\t")
-    mtx_df.to_csv(MTX_FP, sep="\t")
+    mg_df.to_parquet(MG_FP, compression="snappy")
+    mtx_df.to_parquet(MTX_FP, compression="snappy")
+    if os.environ.get("TOY_EXPORT_CSV"):
+        mg_df.to_csv(os.path.splitext(MG_FP)[0] + ".tsv", sep="\t")
+        mtx_df.to_csv(os.path.splitext(MTX_FP)[0] + ".tsv", sep="\t")
 
     print(f"  ✓ Wrote: {MG_FP}")
     print(f"  ✓ Wrote: {MTX_FP}")
@@ -111,8 +117,8 @@ def main():
     generate_toy_taxa()
 
     # Load taxonomic abundances
-    mg_taxa = pd.read_csv(MG_FP, sep='\t', index_col=0)
-    mtx_taxa = pd.read_csv(MTX_FP, sep='\t', index_col=0)
+    mg_taxa = pd.read_parquet(MG_FP)
+    mtx_taxa = pd.read_parquet(MTX_FP)
 
     # Normalize to relative abundance (%)
     mg_taxa_rel = (mg_taxa / mg_taxa.sum(axis=0)) * 100
@@ -121,15 +127,15 @@ def main():
     # Calculate activity scores
     common_taxa = mg_taxa_rel.index.intersection(mtx_taxa_rel.index)
 
-    activity_scores = pd.DataFrame()
-    for taxon in common_taxa:
-        mg_mean = mg_taxa_rel.loc[taxon].mean()
-        mtx_mean = mtx_taxa_rel.loc[taxon].mean()
+    mg_mean = mg_taxa_rel.loc[common_taxa].to_numpy().mean(axis=1)
+    mtx_mean = mtx_taxa_rel.loc[common_taxa].to_numpy().mean(axis=1)
 
-        activity_scores.loc[taxon, 'DNA_Abundance'] = mg_mean
-        activity_scores.loc[taxon, 'RNA_Activity'] = mtx_mean
-        activity_scores.loc[taxon, 'Activity_Score'] = mtx_mean / (mg_mean + 0.01)
-        activity_scores.loc[taxon, 'Log2_Ratio'] = np.log2((mtx_mean + 0.01) / (mg_mean + 0.01))
+    activity_scores = pd.DataFrame({
+        'DNA_Abundance': mg_mean,
+        'RNA_Activity': mtx_mean,
+        'Activity_Score': mtx_mean / (mg_mean + 0.01),
+        'Log2_Ratio': np.log2((mtx_mean + 0.01) / (mg_mean + 0.01)),
+    }, index=common_taxa)
 
     # Sort by activity score
     activity_scores = activity_scores.sort_values('Activity_Score', ascending=False)
@@ -150,7 +156,7 @@ def main():
     # --------------------------------------------------------
     top20_active = activity_scores.head(20)
 
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = plt.subplots(figsize=(12, 8), layout='constrained')
     x = np.arange(len(top20_active))
     width = 0.35
 
@@ -164,15 +170,14 @@ def main():
     ax.legend()
     ax.invert_yaxis()
 
-    plt.tight_layout()
     out_png1 = os.path.join(FIG_DIR, "top_active_species.png")
-    plt.savefig(out_png1, dpi=300, bbox_inches='tight')
+    plt.savefig(out_png1, dpi=150, bbox_inches='tight')
     plt.close()
 
     # --------------------------------------------------------
     # Plot 2: Quadrant scatter (DNA abundance vs RNA activity)
     # --------------------------------------------------------
-    plt.figure(figsize=(10, 10))
+    plt.figure(figsize=(10, 10), layout='constrained')
     plt.scatter(activity_scores['DNA_Abundance'],
                 activity_scores['RNA_Activity'],
                 alpha=0.5, s=50)
@@ -205,9 +210,8 @@ def main():
     plt.xscale('log')
     plt.yscale('log')
 
-    plt.tight_layout()
     out_png2 = os.path.join(FIG_DIR, "species_abundance_vs_activity.png")
-    plt.savefig(out_png2, dpi=300)
+    plt.savefig(out_png2, dpi=150)
     plt.close()
 
     print("Taxonomic integration complete!")
@@ -7,143 +7,147 @@ Usage: python 01_parse_metaquast.py --input metaquast_dir --output results.csv
 """
 
 import os
+import re
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:  # fall back to pandas for the transposed report header
+    pa_csv = None
+
+# MetaQUAST report.txt row label -> (metric name, value type)
+KEY_MAP = {
+    '# contigs (>= 0 bp)': ('total_contigs', int),
+    '# contigs (>= 1000 bp)': ('contigs_1kb', int),
+    '# contigs (>= 5000 bp)': ('contigs_5kb', int),
+    '# contigs (>= 10000 bp)': ('contigs_10kb', int),
+    'Total length (>= 0 bp)': ('total_length', int),
+    'Total length (>= 1000 bp)': ('total_length_1kb', int),
+    'Largest contig': ('largest_contig', int),
+    'GC (%)': ('gc_percent', float),
+    'N50': ('n50', int),
+    'N75': ('n75', int),
+    'L50': ('l50', int),
+    'L75': ('l75', int),
+    '# misassemblies': ('misassemblies', int),
+    '# mismatches per 100 kbp': ('mismatches_per_100kb', float),
+    '# indels per 100 kbp': ('indels_per_100kb', float),
+}
+
+# Output columns, in report order (fixed, so pandas need not infer them)
+COLUMNS = [name for name, _ in KEY_MAP.values()] + ['sample', 'assembler']
+
+# One match per metric row: the label, then the last value on the line
+# (the last assembly column when a report covers several assemblies)
+PATTERN = re.compile(
+    r'^(' + '|'.join(re.escape(k) for k in KEY_MAP) + r')[ \t].*?(\S+)[ \t\r]*$',
+    re.MULTILINE,
+)
+
 def parse_metaquast_report(report_file):
     """Parse a MetaQUAST report.txt file"""
     metrics = {}
     
     with open(report_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            
-            # Parse key metrics
-            if '# contigs (>= 0 bp)' in line:
-                metrics['total_contigs'] = int(line.split()[-1])
-            elif '# contigs (>= 1000 bp)' in line:
-                metrics['contigs_1kb'] = int(line.split()[-1])
-            elif '# contigs (>= 5000 bp)' in line:
-                metrics['contigs_5kb'] = int(line.split()[-1])
-            elif '# contigs (>= 10000 bp)' in line:
-                metrics['contigs_10kb'] = int(line.split()[-1])
-            elif 'Total length (>= 0 bp)' in line:
-                metrics['total_length'] = int(line.split()[-1])
-            elif 'Total length (>= 1000 bp)' in line:
-                metrics['total_length_1kb'] = int(line.split()[-1])
-            elif 'Largest contig' in line:
-                metrics['largest_contig'] = int(line.split()[-1])
-            elif line.startswith('N50'):
-                metrics['n50'] = int(line.split()[-1])
-            elif line.startswith('N75'):
-                metrics['n75'] = int(line.split()[-1])
-            elif line.startswith('L50'):
-                metrics['l50'] = int(line.split()[-1])
-            elif line.startswith('L75'):
-                metrics['l75'] = int(line.split()[-1])
-            elif 'GC (%)' in line:
-                metrics['gc_percent'] = float(line.split()[-1])
-            elif '# misassemblies' in line:
-                metrics['misassemblies'] = int(line.split()[-1])
-            elif '# mismatches per 100 kbp' in line:
-                metrics['mismatches_per_100kb'] = float(line.split()[-1])
-            elif '# indels per 100 kbp' in line:
-                metrics['indels_per_100kb'] = float(line.split()[-1])
+        text = f.read()
+    
+    for m in PATTERN.finditer(text):
+        name, cast = KEY_MAP[m.group(1)]
+        metrics[name] = cast(m.group(2))
     
     return metrics
 
+def read_assembly_names(transposed_file):
+    """Assembly names from a transposed_report.tsv header (first column is metric names)"""
+    if pa_csv is not None:
+        table = pa_csv.read_csv(
+            transposed_file,
+            parse_options=pa_csv.ParseOptions(delimiter='\t'),
+        )
+        return table.column_names[1:]
+    return pd.read_csv(transposed_file, sep='\t', nrows=0).columns[1:].tolist()
+
+def parse_metaquast_sample(sample_dir):
+    """Parse one MetaQUAST sample directory into one row per assembly"""
+    metrics = parse_metaquast_report(sample_dir / 'report.txt')
+    metrics['sample'] = sample_dir.name
+    
+    # Check for multiple assemblies in the same report
+    transposed_file = sample_dir / 'transposed_report.tsv'
+    if transposed_file.exists():
+        # Process each assembly separately
+        rows = []
+        for col in read_assembly_names(transposed_file):
+            assembly_metrics = metrics.copy()
+            assembly_metrics['assembler'] = col
+            rows.append(assembly_metrics)
+        return rows
+    
+    metrics['assembler'] = 'unknown'
+    return [metrics]
+
 def parse_metaquast_directory(metaquast_dir):
-    """Parse all MetaQUAST results in a directory"""
-    results = []
-    
+    """Parse all MetaQUAST results in a directory (one worker process per sample)"""
     # Find all report.txt files
     metaquast_path = Path(metaquast_dir)
-    
-    for sample_dir in metaquast_path.iterdir():
-        if not sample_dir.is_dir():
-            continue
-        
-        report_file = sample_dir / 'report.txt'
-        if not report_file.exists():
-            continue
-        
-        print(f"Parsing {sample_dir.name}...")
-        
-        try:
-            metrics = parse_metaquast_report(report_file)
-            metrics['sample'] = sample_dir.name
-            
-            # Check for multiple assemblies in the same report
-            transposed_file = sample_dir / 'transposed_report.tsv'
-            if transposed_file.exists():
-                df = pd.read_csv(transposed_file, sep='\t')
-                # Process each assembly separately
-                for col in df.columns[1:]:  # Skip first column (metric names)
-                    assembly_metrics = metrics.copy()
-                    assembly_metrics['assembler'] = col
-                    results.append(assembly_metrics)
-            else:
-                metrics['assembler'] = 'unknown'
-                results.append(metrics)
-                
-        except Exception as e:
-            print(f"  Error parsing {sample_dir.name}: {e}")
-            continue
+    sample_dirs = [d for d in metaquast_path.iterdir()
+                   if d.is_dir() and (d / 'report.txt').exists()]
+    
+    # One slot per sample directory, filled by index as workers finish
+    sample_rows = [None] * len(sample_dirs)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(parse_metaquast_sample, d): i
+                   for i, d in enumerate(sample_dirs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            print(f"Parsing {sample_dirs[i].name}...")
+            try:
+                sample_rows[i] = future.result()
+            except Exception as e:
+                print(f"  Error parsing {sample_dirs[i].name}: {e}")
+    
+    # Keep directory order regardless of completion order
+    results = [row for rows in sample_rows if rows for row in rows]
     
     return results
 
-def calculate_quality_score(row):
-    """Calculate overall assembly quality score (0-100)"""
-    score = 0
+def calculate_quality_scores(df):
+    """Calculate overall assembly quality score (0-100) for every row at once"""
+    n50 = df['n50'].to_numpy()
+    total_contigs = df['total_contigs'].to_numpy()
+    largest_contig = df['largest_contig'].to_numpy()
+    l50 = df['l50'].to_numpy(dtype=float)
     
     # N50 contribution (40 points max)
-    if row['n50'] >= 20000:
-        score += 40
-    elif row['n50'] >= 10000:
-        score += 30
-    elif row['n50'] >= 5000:
-        score += 20
-    elif row['n50'] >= 1000:
-        score += 10
+    score_n50 = np.select(
+        [n50 >= 20000, n50 >= 10000, n50 >= 5000, n50 >= 1000],
+        [40, 30, 20, 10], default=0)
     
     # Total contigs contribution (20 points max, fewer is better)
-    if row['total_contigs'] <= 5000:
-        score += 20
-    elif row['total_contigs'] <= 20000:
-        score += 15
-    elif row['total_contigs'] <= 50000:
-        score += 10
-    elif row['total_contigs'] <= 100000:
-        score += 5
+    score_contigs = np.select(
+        [total_contigs <= 5000, total_contigs <= 20000,
+         total_contigs <= 50000, total_contigs <= 100000],
+        [20, 15, 10, 5], default=0)
     
     # Largest contig contribution (20 points max)
-    if row['largest_contig'] >= 200000:
-        score += 20
-    elif row['largest_contig'] >= 100000:
-        score += 15
-    elif row['largest_contig'] >= 50000:
-        score += 10
-    elif row['largest_contig'] >= 10000:
-        score += 5
+    score_largest = np.select(
+        [largest_contig >= 200000, largest_contig >= 100000,
+         largest_contig >= 50000, largest_contig >= 10000],
+        [20, 15, 10, 5], default=0)
     
     # L50 contribution (20 points max, fewer is better)
-    total_contigs = row['total_contigs']
-    l50_ratio = row['l50'] / total_contigs if total_contigs > 0 else 1
-    
-    if l50_ratio <= 0.01:
-        score += 20
-    elif l50_ratio <= 0.05:
-        score += 15
-    elif l50_ratio <= 0.10:
-        score += 10
-    elif l50_ratio <= 0.20:
-        score += 5
-    
-    return score
+    has_contigs = total_contigs > 0
+    l50_ratio = np.divide(l50, total_contigs, out=np.ones_like(l50), where=has_contigs)
+    score_l50 = np.select(
+        [l50_ratio <= 0.01, l50_ratio <= 0.05, l50_ratio <= 0.10, l50_ratio <= 0.20],
+        [20, 15, 10, 5], default=0)
+    
+    return score_n50 + score_contigs + score_largest + score_l50
 
 def main():
     parser = argparse.ArgumentParser(
@@ -181,10 +185,10 @@ def main():
         sys.exit(1)
     
     # Convert to DataFrame
-    df = pd.DataFrame(results)
+    df = pd.DataFrame.from_records(results, columns=COLUMNS)
     
     # Calculate quality scores
-    df['quality_score'] = df.apply(calculate_quality_score, axis=1)
+    df['quality_score'] = calculate_quality_scores(df)
     
     # Sort by sample and quality score
     df = df.sort_values(['sample', 'quality_score'], ascending=[True, False])
@@ -9,10 +9,54 @@ Usage: python 02_assembly_statistics.py --assemblies *.fasta --output stats.csv
 import os
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-from Bio import SeqIO
+from numba import njit
 from pathlib import Path
-import statistics
+
+@njit(cache=True)
+def n_l_stats(sorted_desc, total):
+    """
+    One cumulative walk over contig lengths (longest first) giving
+    [N50, L50, N75, L75, N90, L90]
+    """
+    out = np.zeros(6, np.int64)
+    targets = (total * 0.5, total * 0.75, total * 0.9)
+    cum = 0
+    ti = 0
+    for i in range(sorted_desc.size):
+        cum += sorted_desc[i]
+        while ti < 3 and cum >= targets[ti]:
+            out[2 * ti] = sorted_desc[i]
+            out[2 * ti + 1] = i + 1
+            ti += 1
+        if ti == 3:
+            break
+    return out
+
+def iter_fasta_lengths_gc(fasta_file, chunk_size=1 << 20):
+    """
+    Stream a FASTA file as raw bytes, yielding (header, length, gc_count)
+    per record. Only the running length and G/C count of the current record
+    are kept, so memory stays at one read buffer regardless of assembly size.
+    """
+    header = None
+    length = gc = 0
+    with open(fasta_file, 'rb', buffering=chunk_size) as handle:
+        for line in handle:
+            if line.startswith(b'>'):
+                if header is not None:
+                    yield header, length, gc
+                header = line[1:].rstrip()
+                length = gc = 0
+            elif header is not None:
+                line = line.rstrip()
+                length += len(line)
+                gc += (line.count(b'G') + line.count(b'C')
+                       + line.count(b'g') + line.count(b'c'))
+    if header is not None:
+        yield header, length, gc
 
 def calculate_assembly_stats(fasta_file):
     """Calculate comprehensive assembly statistics"""
@@ -24,80 +68,50 @@ def calculate_assembly_stats(fasta_file):
         'sample': Path(fasta_file).parent.name
     }
     
-    # Read all sequences
-    sequences = list(SeqIO.parse(fasta_file, "fasta"))
+    # Read per-contig lengths and G/C counts (sequences are never kept)
+    records = [(length, gc) for _, length, gc in iter_fasta_lengths_gc(fasta_file)]
     
-    if not sequences:
+    if not records:
         print(f"    WARNING: No sequences found in {fasta_file}")
         return None
     
-    # Calculate lengths
-    lengths = [len(seq.seq) for seq in sequences]
-    lengths_sorted = sorted(lengths, reverse=True)
+    # One int64 array each; every statistic below is a NumPy pass
+    lengths, gc_counts = np.array(records, dtype=np.int64).T
     
     # Basic statistics
-    stats['total_contigs'] = len(lengths)
-    stats['total_length'] = sum(lengths)
-    stats['mean_length'] = statistics.mean(lengths)
-    stats['median_length'] = statistics.median(lengths)
-    stats['min_length'] = min(lengths)
-    stats['max_length'] = max(lengths)
-    stats['stdev_length'] = statistics.stdev(lengths) if len(lengths) > 1 else 0
-    
-    # N50 calculation
-    cumsum = 0
-    for i, length in enumerate(lengths_sorted):
-        cumsum += length
-        if cumsum >= stats['total_length'] / 2:
-            stats['n50'] = length
-            stats['l50'] = i + 1
-            break
-    
-    # N75 calculation
-    cumsum = 0
-    for i, length in enumerate(lengths_sorted):
-        cumsum += length
-        if cumsum >= stats['total_length'] * 0.75:
-            stats['n75'] = length
-            stats['l75'] = i + 1
-            break
-    
-    # N90 calculation
-    cumsum = 0
-    for i, length in enumerate(lengths_sorted):
-        cumsum += length
-        if cumsum >= stats['total_length'] * 0.90:
-            stats['n90'] = length
-            stats['l90'] = i + 1
-            break
+    stats['total_contigs'] = lengths.size
+    stats['total_length'] = lengths.sum()
+    stats['mean_length'] = lengths.mean()
+    stats['median_length'] = np.median(lengths)
+    stats['min_length'] = lengths.min()
+    stats['max_length'] = lengths.max()
+    stats['stdev_length'] = lengths.std(ddof=1) if lengths.size > 1 else 0
+    
+    # N50/N75/N90: first contig (longest first) where the cumulative length
+    # reaches the given fraction of the assembly
+    n50, l50, n75, l75, n90, l90 = n_l_stats(np.sort(lengths)[::-1], stats['total_length'])
+    stats.update(n50=n50, l50=l50, n75=n75, l75=l75, n90=n90, l90=l90)
     
     # Count contigs by size
-    stats['contigs_500bp'] = sum(1 for l in lengths if l >= 500)
-    stats['contigs_1kb'] = sum(1 for l in lengths if l >= 1000)
-    stats['contigs_5kb'] = sum(1 for l in lengths if l >= 5000)
-    stats['contigs_10kb'] = sum(1 for l in lengths if l >= 10000)
-    stats['contigs_50kb'] = sum(1 for l in lengths if l >= 50000)
-    stats['contigs_100kb'] = sum(1 for l in lengths if l >= 100000)
+    thresholds = np.array([500, 1000, 5000, 10000, 50000, 100000])
+    counts = (lengths[:, None] >= thresholds).sum(axis=0)
+    for label, count in zip(['500bp', '1kb', '5kb', '10kb', '50kb', '100kb'], counts):
+        stats[f'contigs_{label}'] = count
     
     # Calculate GC content
-    gc_contents = []
-    for seq in sequences:
-        seq_str = str(seq.seq).upper()
-        gc_count = seq_str.count('G') + seq_str.count('C')
-        total = len(seq_str)
-        if total > 0:
-            gc_contents.append(gc_count / total * 100)
-    
-    if gc_contents:
-        stats['mean_gc'] = statistics.mean(gc_contents)
-        stats['median_gc'] = statistics.median(gc_contents)
-        stats['min_gc'] = min(gc_contents)
-        stats['max_gc'] = max(gc_contents)
-        stats['stdev_gc'] = statistics.stdev(gc_contents) if len(gc_contents) > 1 else 0
+    nonempty = lengths > 0
+    gc_contents = gc_counts[nonempty] / lengths[nonempty] * 100
+    
+    if gc_contents.size:
+        stats['mean_gc'] = gc_contents.mean()
+        stats['median_gc'] = np.median(gc_contents)
+        stats['min_gc'] = gc_contents.min()
+        stats['max_gc'] = gc_contents.max()
+        stats['stdev_gc'] = gc_contents.std(ddof=1) if gc_contents.size > 1 else 0
     
     # Calculate assembly efficiency
-    stats['bases_in_1kb_contigs'] = sum(l for l in lengths if l >= 1000)
-    stats['bases_in_10kb_contigs'] = sum(l for l in lengths if l >= 10000)
+    stats['bases_in_1kb_contigs'] = lengths[lengths >= 1000].sum()
+    stats['bases_in_10kb_contigs'] = lengths[lengths >= 10000].sum()
     stats['percent_in_1kb'] = (stats['bases_in_1kb_contigs'] / stats['total_length'] * 100) \
                               if stats['total_length'] > 0 else 0
     stats['percent_in_10kb'] = (stats['bases_in_10kb_contigs'] / stats['total_length'] * 100) \
@@ -131,20 +145,26 @@ def main():
     print("")
     
     # Calculate statistics for all assemblies
-    all_stats = []
-    
+    # (files are independent, so each one is handled by a worker process)
+    fasta_files = []
     for fasta_file in args.assemblies:
         if not os.path.exists(fasta_file):
             print(f"  WARNING: File not found: {fasta_file}")
             continue
-        
-        try:
-            stats = calculate_assembly_stats(fasta_file)
-            if stats:
-                all_stats.append(stats)
-        except Exception as e:
-            print(f"  ERROR processing {fasta_file}: {e}")
-            continue
+        fasta_files.append(fasta_file)
+    
+    file_stats = {}
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {executor.submit(calculate_assembly_stats, f): f for f in fasta_files}
+        for future in as_completed(futures):
+            fasta_file = futures[future]
+            try:
+                file_stats[fasta_file] = future.result()
+            except Exception as e:
+                print(f"  ERROR processing {fasta_file}: {e}")
+    
+    # Keep command-line order regardless of completion order
+    all_stats = [file_stats[f] for f in fasta_files if file_stats.get(f)]
     
     if not all_stats:
         print("\nNo statistics calculated!")
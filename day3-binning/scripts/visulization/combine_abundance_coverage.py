@@ -7,13 +7,35 @@ Usage: python combine_abundance_coverage.py --coverm mag_abundance/mag_abundance
 """
 
 import argparse
+import warnings
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # file output only; no GUI backend needed
 import matplotlib.pyplot as plt
+from matplotlib.lines import Line2D
 import seaborn as sns
 from pathlib import Path
 import sys
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv  # multithreaded C++ CSV writer
+except ImportError:  # fall back to DataFrame.to_csv
+    pa = None
+
+# MAG classes, in the order they are reported and plotted
+CLASSIFICATIONS = [
+    'High_Abundance_High_Coverage',
+    'High_Abundance_Low_Coverage',
+    'Low_Abundance_High_Coverage',
+    'Low_Abundance_Low_Coverage',
+    'Incomplete_Data',
+]
+
+# Drop scatter/line vertices closer than a pixel when rendering
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description='Combine CoverM and SingleM results'
@@ -36,19 +58,46 @@ def parse_arguments():
     
     return parser.parse_args()
 
+def save_figure(fig, output_path):
+    """
+    Save fig as PDF (output_path) and PNG, 300 dpi.
+    
+    Both figures have artists outside the axes (legend, suptitle), so the
+    tight bbox is measured once and reused by both saves.
+    """
+    fig.canvas.draw()
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.1)
+    fig.savefig(output_path, dpi=300, bbox_inches=bbox)
+    fig.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches=bbox)
+
+def write_tsv(df, output_path):
+    """Write df (index included) as a tab-separated table"""
+    if pa is None:
+        df.to_csv(output_path, sep='\t')
+        return
+    
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    with open(output_path, 'wb') as f:
+        # pyarrow quotes header names even with quoting_style="none"; write them here
+        f.write(('\t'.join(table.column_names) + '\n').encode())
+        pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(
+            include_header=False, delimiter='\t', quoting_style='none'))
+
 def load_coverm_data(filepath):
     """Load CoverM abundance data"""
     print(f"Loading CoverM data from: {filepath}")
     
-    df = pd.read_csv(filepath, sep='\t')
-    
-    # Extract relative abundance columns
-    ra_cols = [col for col in df.columns if 'Relative Abundance' in col]
-    abundance = df[['Genome'] + ra_cols].copy()
+    # Peek at the header, then parse only the Genome and relative abundance columns
+    header = pd.read_csv(filepath, sep='\t', nrows=0).columns
+    ra_cols = [col for col in header if 'Relative Abundance' in col]
+    df = pd.read_csv(filepath, sep='\t',
+                     usecols=['Genome'] + ra_cols,
+                     dtype={col: np.float32 for col in ra_cols})
     
     # Clean column names
-    abundance.columns = ['MAG'] + [col.split()[0] + '_RA' for col in ra_cols]
-    abundance = abundance.set_index('MAG')
+    abundance = (df.set_index('Genome')
+                   .rename(columns=lambda col: col.split()[0] + '_RA'))
+    abundance.index.name = 'MAG'
     
     print(f"  Loaded {len(abundance)} MAGs, {len(abundance.columns)} samples")
     
@@ -58,16 +107,15 @@ def load_singlem_data(filepath):
     """Load SingleM coverage data"""
     print(f"Loading SingleM data from: {filepath}")
     
-    df = pd.read_csv(filepath, sep='\t')
+    df = pd.read_csv(filepath, sep='\t',
+                     usecols=['genome', 'sample', 'coverage'],
+                     dtype={'sample': str, 'coverage': np.float32})
     
-    # Create pivot table
-    coverage = df.pivot_table(values='coverage', 
-                              index='genome', 
-                              columns='sample', 
-                              aggfunc='mean')
+    # Mean coverage per genome x sample
+    coverage = df.groupby(['genome', 'sample'])['coverage'].mean().unstack('sample')
     
     # Rename columns
-    coverage.columns = [col + '_Cov' for col in coverage.columns]
+    coverage.columns = coverage.columns.astype(str) + '_Cov'
     coverage.index.name = 'MAG'
     
     print(f"  Loaded {len(coverage)} MAGs, {len(coverage.columns)} samples")
@@ -78,13 +126,33 @@ def combine_data(abundance, coverage):
     """Combine abundance and coverage data"""
     print("\nCombining data...")
     
-    # Merge on MAG index
-    combined = abundance.join(coverage, how='outer')
+    # Outer merge on MAG names: look each side's names up once in the sorted
+    # union, then place both blocks by integer row position (MAGs missing
+    # from one tool keep NaN in that tool's columns)
+    all_mags = abundance.index.union(coverage.index)
+    ra_pos = all_mags.get_indexer(abundance.index)
+    cov_pos = all_mags.get_indexer(coverage.index)
+    
+    values = np.full((len(all_mags), abundance.shape[1] + coverage.shape[1]),
+                     np.nan, dtype=np.float32)
+    values[ra_pos, :abundance.shape[1]] = abundance.to_numpy(np.float32)
+    values[cov_pos, abundance.shape[1]:] = coverage.to_numpy(np.float32)
+    combined = pd.DataFrame(values, index=all_mags,
+                            columns=list(abundance.columns) + list(coverage.columns))
+    
+    # Remember which columns came from each tool for the later steps
+    combined.attrs['ra_cols'] = list(abundance.columns)
+    combined.attrs['cov_cols'] = list(coverage.columns)
+    
+    in_ra = np.zeros(len(all_mags), dtype=bool)
+    in_ra[ra_pos] = True
+    in_cov = np.zeros(len(all_mags), dtype=bool)
+    in_cov[cov_pos] = True
     
     print(f"  Combined dataset: {len(combined)} MAGs")
-    print(f"  MAGs in both datasets: {len(combined.dropna())}")
-    print(f"  MAGs only in CoverM: {combined[combined.filter(like='_Cov').isna().all(axis=1)].shape[0]}")
-    print(f"  MAGs only in SingleM: {combined[combined.filter(like='_RA').isna().all(axis=1)].shape[0]}")
+    print(f"  MAGs in both datasets: {(in_ra & in_cov).sum()}")
+    print(f"  MAGs only in CoverM: {(in_ra & ~in_cov).sum()}")
+    print(f"  MAGs only in SingleM: {(in_cov & ~in_ra).sum()}")
     
     return combined
 
@@ -92,34 +160,40 @@ def classify_mags(combined):
     """Classify MAGs based on abundance and coverage"""
     print("\nClassifying MAGs...")
     
-    # Get column names
-    ra_cols = [col for col in combined.columns if '_RA' in col]
-    cov_cols = [col for col in combined.columns if '_Cov' in col]
-    
-    # Calculate mean abundance and coverage
-    combined['Mean_RA'] = combined[ra_cols].mean(axis=1)
-    combined['Mean_Cov'] = combined[cov_cols].mean(axis=1)
-    
-    # Classify
-    def classify(row):
-        ra = row['Mean_RA']
-        cov = row['Mean_Cov']
-        
-        if pd.isna(ra) or pd.isna(cov):
-            return 'Incomplete_Data'
-        elif ra > 5 and cov > 80:
-            return 'High_Abundance_High_Coverage'
-        elif ra > 5 and cov <= 80:
-            return 'High_Abundance_Low_Coverage'
-        elif ra <= 5 and cov > 80:
-            return 'Low_Abundance_High_Coverage'
-        else:
-            return 'Low_Abundance_Low_Coverage'
-    
-    combined['Classification'] = combined.apply(classify, axis=1)
+    ra_cols = combined.attrs['ra_cols']
+    cov_cols = combined.attrs['cov_cols']
+    
+    # Calculate mean abundance and coverage, skipping missing samples
+    # (MAGs absent from one tool are all-NaN rows and stay NaN)
+    ra_mat = combined[ra_cols].to_numpy(dtype=np.float32, copy=False)
+    cov_mat = combined[cov_cols].to_numpy(dtype=np.float32, copy=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        combined['Mean_RA'] = np.nanmean(ra_mat, axis=1)
+        combined['Mean_Cov'] = np.nanmean(cov_mat, axis=1)
+    
+    # Classify (whole columns at once; the first matching condition wins)
+    ra = combined['Mean_RA'].to_numpy()
+    cov = combined['Mean_Cov'].to_numpy()
+    conditions = [
+        np.isnan(ra) | np.isnan(cov),
+        (ra > 5) & (cov > 80),
+        (ra > 5) & (cov <= 80),
+        (ra <= 5) & (cov > 80),
+    ]
+    choices = [
+        CLASSIFICATIONS.index('Incomplete_Data'),
+        CLASSIFICATIONS.index('High_Abundance_High_Coverage'),
+        CLASSIFICATIONS.index('High_Abundance_Low_Coverage'),
+        CLASSIFICATIONS.index('Low_Abundance_High_Coverage'),
+    ]
+    codes = np.select(conditions, choices,
+                      default=CLASSIFICATIONS.index('Low_Abundance_Low_Coverage'))
+    combined['Classification'] = pd.Categorical.from_codes(codes, CLASSIFICATIONS)
     
     # Print classification summary
     class_counts = combined['Classification'].value_counts()
+    class_counts = class_counts[class_counts > 0]
     print("\nMAG Classification:")
     for cls, count in class_counts.items():
         print(f"  {cls}: {count}")
@@ -141,16 +215,20 @@ def create_decision_matrix_plot(combined, output_dir):
         'Incomplete_Data': '#95a5a6'                # Gray
     }
     
-    for cls, color in colors.items():
-        mask = combined['Classification'] == cls
-        if mask.any():
-            ax.scatter(combined[mask]['Mean_RA'], 
-                      combined[mask]['Mean_Cov'],
-                      label=cls.replace('_', ' '),
-                      color=color,
-                      s=100,
-                      alpha=0.6,
-                      edgecolors='black')
+    ax.scatter(combined['Mean_RA'],
+               combined['Mean_Cov'],
+               c=combined['Classification'].map(colors).to_numpy(),
+               s=100,
+               alpha=0.6,
+               edgecolors='black')
+    
+    # One legend entry per class present, matching the scatter markers
+    present = combined['Classification'].value_counts() > 0
+    class_handles = [Line2D([0], [0], marker='o', linestyle='none',
+                            markerfacecolor=color, markeredgecolor='black',
+                            markersize=10, alpha=0.6,
+                            label=cls.replace('_', ' '))
+                     for cls, color in colors.items() if present[cls]]
     
     # Add threshold lines
     ax.axvline(x=5, color='black', linestyle='--', alpha=0.3, label='RA threshold (5%)')
@@ -172,18 +250,19 @@ def create_decision_matrix_plot(combined, output_dir):
                  fontsize=14, fontweight='bold', pad=20)
     ax.set_xlim(0, combined['Mean_RA'].max() * 1.1)
     ax.set_ylim(0, 105)
-    ax.legend(loc='center left', bbox_to_anchor=(1, 0.5))
+    line_handles, _ = ax.get_legend_handles_labels()
+    ax.legend(handles=class_handles + line_handles,
+              loc='center left', bbox_to_anchor=(1, 0.5))
     ax.grid(alpha=0.3)
     
     plt.tight_layout()
     
     # Save
     output_path = Path(output_dir) / 'mag_decision_matrix.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
-    plt.close()
+    plt.close(fig)
 
 def create_combined_heatmap(combined, output_dir, top_n=20):
     """Create heatmap showing both abundance and coverage"""
@@ -193,8 +272,8 @@ def create_combined_heatmap(combined, output_dir, top_n=20):
     top_mags = combined.nlargest(top_n, 'Mean_RA').index
     
     # Extract data for top MAGs
-    ra_cols = [col for col in combined.columns if '_RA' in col]
-    cov_cols = [col for col in combined.columns if '_Cov' in col]
+    ra_cols = combined.attrs['ra_cols']
+    cov_cols = combined.attrs['cov_cols']
     
     # Create figure with two subplots
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 10))
@@ -227,11 +306,10 @@ def create_combined_heatmap(combined, output_dir, top_n=20):
     
     # Save
     output_path = Path(output_dir) / 'combined_abundance_coverage_heatmap.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
-    plt.close()
+    plt.close(fig)
 
 def save_results(combined, output_dir):
     """Save combined results to file"""
@@ -242,15 +320,17 @@ def save_results(combined, output_dir):
     
     # Save full combined table
     output_path = output_dir / 'combined_abundance_coverage.tsv'
-    combined.to_csv(output_path, sep='\t')
+    write_tsv(combined, output_path)
     print(f"  ✓ Saved: {output_path}")
     
     # Save classified MAGs
-    for cls in combined['Classification'].unique():
+    for cls in combined['Classification'].cat.categories:
         if cls != 'Incomplete_Data':
             cls_mags = combined[combined['Classification'] == cls]
+            if cls_mags.empty:
+                continue
             cls_path = output_dir / f'{cls}_mags.tsv'
-            cls_mags.to_csv(cls_path, sep='\t')
+            write_tsv(cls_mags, cls_path)
             print(f"  ✓ Saved: {cls_path}")
     
     # Save summary statistics
@@ -264,6 +344,8 @@ def save_results(combined, output_dir):
         
         f.write("Classification Summary:\n")
         for cls, count in combined['Classification'].value_counts().items():
+            if count == 0:
+                continue
             pct = count / len(combined) * 100
             f.write(f"  {cls}: {count} ({pct:.1f}%)\n")
         
@@ -7,13 +7,35 @@ Usage: python visualize_mag_abundance.py --input mag_abundance/mag_abundance_tab
 """
 
 import argparse
+import heapq
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # file output only; also safe in worker processes
 import matplotlib.pyplot as plt
 import seaborn as sns
+from numba import njit, prange
 from pathlib import Path
 import sys
 
+try:
+    import pyarrow  # noqa: F401  (enables pandas' multithreaded pyarrow CSV engine)
+    CSV_ENGINE = 'pyarrow'
+except ImportError:  # fall back to pandas' C parser
+    CSV_ENGINE = 'c'
+
+# Tables larger than this get a hint to rerun with --stream
+LARGE_TABLE_BYTES = 1 << 30
+CHUNK_ROWS = 100_000
+
+# Heatmaps with more cells than this skip per-cell annotation and grid lines
+FAST_HEATMAP_CELLS = 2000
+# ... and above this the cells are drawn without value labels
+ANNOT_MAX_CELLS = 500
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description='Visualize MAG abundance from CoverM output'
@@ -40,59 +62,130 @@ def parse_arguments():
         default=20,
         help='Number of top MAGs to display in heatmap (default: 20)'
     )
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help='Draw heatmaps as a single image without cell annotations '
+             '(automatic above %d cells)' % FAST_HEATMAP_CELLS
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Summarize the table in chunks instead of loading it whole, for '
+             'tables that do not fit in memory (only the heatmap is drawn)'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Worker processes for rendering figures (default: 1, render in '
+             'this process; only worth raising for very large tables)'
+    )
     
     return parser.parse_args()
 
+def save_figure(fig, output_path, tight=False):
+    """
+    Save fig as PDF (output_path) and PNG, 300 dpi.
+    
+    Figures are created with layout='constrained', so the saves need no
+    bbox_inches='tight' measuring pass. tight=True is for figures with
+    artists that can extend past the canvas (a long legend outside the
+    axes): the tight bbox is then measured once and reused by both saves.
+    """
+    bbox = None
+    if tight:
+        fig.canvas.draw()
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.1)
+    fig.savefig(output_path, dpi=300, bbox_inches=bbox)
+    fig.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches=bbox)
+
 def load_abundance_data(filepath):
     """Load and parse CoverM abundance table"""
     print(f"Loading abundance data from: {filepath}")
     
-    df = pd.read_csv(filepath, sep='\t')
+    # Peek at the header, then parse only the Genome and relative abundance columns
+    header = pd.read_csv(filepath, sep='\t', nrows=0).columns
     
     # Extract relative abundance columns
-    ra_cols = [col for col in df.columns if 'Relative Abundance' in col]
+    ra_cols = [col for col in header if 'Relative Abundance' in col]
     
     if not ra_cols:
         print("ERROR: No 'Relative Abundance' columns found")
         sys.exit(1)
     
-    # Create clean dataframe
-    abundance_df = df[['Genome'] + ra_cols].copy()
-    
-    # Clean column names (extract sample names)
-    clean_cols = ['MAG'] + [col.split()[0] for col in ra_cols]
-    abundance_df.columns = clean_cols
+    abundance_df = pd.read_csv(filepath, sep='\t',
+                               usecols=['Genome'] + ra_cols,
+                               dtype={col: np.float32 for col in ra_cols},
+                               engine=CSV_ENGINE)
     
-    # Set MAG as index
-    abundance_df = abundance_df.set_index('MAG')
+    # Clean column names (extract sample names) and set MAG as index
+    abundance_df = abundance_df.rename(columns={col: col.split()[0] for col in ra_cols})
+    abundance_df = abundance_df.set_index('Genome').rename_axis('MAG')
     
     print(f"Loaded {len(abundance_df)} MAGs across {len(abundance_df.columns)} samples")
     
     return abundance_df
 
-def create_abundance_heatmap(df, output_dir, top_n=20):
+def annotate_cells(ax, values, fmt):
+    """Write cell values onto a seaborn heatmap, in a contrasting color"""
+    mesh = ax.collections[0]
+    rgb = mesh.cmap(mesh.norm(values))[..., :3]
+    dark = rgb @ np.array([0.299, 0.587, 0.114]) < 0.408
+    for (i, j), v in np.ndenumerate(values):
+        if not np.isnan(v):
+            ax.text(j + 0.5, i + 0.5, format(v, fmt), ha='center', va='center',
+                    fontsize=8, color='white' if dark[i, j] else 'black')
+
+def draw_raster_heatmap(fig, ax, data, cmap, cbar_label, vmin=None, vmax=None):
+    """Heatmap as one image: no per-cell text or grid lines (for large matrices)"""
+    im = ax.imshow(data.to_numpy(), cmap=cmap, vmin=vmin, vmax=vmax,
+                   aspect='auto', interpolation='nearest')
+    ax.set_xticks(range(data.shape[1]), labels=data.columns)
+    ax.set_yticks(range(data.shape[0]), labels=data.index)
+    fig.colorbar(im, ax=ax, label=cbar_label)
+
+@dataclass
+class AbundanceCache:
+    """Arrays derived from one abundance table, computed once and shared by the plots"""
+    A: np.ndarray         # MAGs x samples, float32
+    row_mean: np.ndarray  # mean abundance per MAG
+    row_max: np.ndarray   # max abundance per MAG
+    nonzero: np.ndarray   # all nonzero abundances, flattened
+
+def create_abundance_heatmap(df, output_dir, top_n=20, fast=False, cache=None):
     """Create abundance heatmap for top N MAGs"""
     print(f"\nCreating abundance heatmap (top {top_n} MAGs)...")
     
     # Calculate mean abundance across samples
-    df_mean = df.mean(axis=1).sort_values(ascending=False)
+    if cache is not None:
+        means = cache.row_mean
+    else:
+        means = df.to_numpy(np.float32, copy=False).mean(axis=1)
     
-    # Select top N MAGs
-    top_mags = df_mean.head(top_n).index
-    df_top = df.loc[top_mags]
+    # Select top N MAGs (partial selection; only the top N are sorted)
+    k = min(top_n, means.size)
+    top_idx = np.argpartition(-means, k - 1)[:k]
+    top_idx = top_idx[np.argsort(-means[top_idx], kind='stable')]
+    df_top = df.iloc[top_idx]
     
     # Create figure
-    fig, ax = plt.subplots(figsize=(12, 10))
-    
-    # Create heatmap
-    sns.heatmap(df_top, 
-                annot=True, 
-                fmt='.2f', 
-                cmap='YlOrRd',
-                cbar_kws={'label': 'Relative Abundance (%)'},
-                linewidths=0.5,
-                linecolor='gray',
-                ax=ax)
+    fig, ax = plt.subplots(figsize=(12, 10), layout='constrained')
+    
+    # Create heatmap (large matrices: one raster image instead of per-cell artists)
+    if fast or df_top.size > FAST_HEATMAP_CELLS:
+        draw_raster_heatmap(fig, ax, df_top, 'YlOrRd', 'Relative Abundance (%)')
+    else:
+        sns.heatmap(df_top, 
+                    annot=False, 
+                    cmap='YlOrRd',
+                    cbar_kws={'label': 'Relative Abundance (%)'},
+                    linewidths=0.5,
+                    linecolor='gray',
+                    ax=ax)
+        # Value labels only where they are legible
+        if df_top.size < ANNOT_MAX_CELLS:
+            annotate_cells(ax, df_top.to_numpy(), '.2f')
     
     ax.set_title(f'Top {top_n} MAG Relative Abundance Across Samples', 
                  fontsize=14, fontweight='bold', pad=20)
@@ -103,38 +196,49 @@ def create_abundance_heatmap(df, output_dir, top_n=20):
     plt.xticks(rotation=45, ha='right')
     plt.yticks(rotation=0)
     
-    plt.tight_layout()
-    
     # Save
     output_path = Path(output_dir) / 'mag_abundance_heatmap.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
-def create_composition_barplot(df, output_dir, min_abundance=0.1):
+def create_composition_barplot(df, output_dir, min_abundance=0.1, cache=None):
     """Create stacked bar chart showing community composition"""
     print(f"\nCreating composition stacked bar chart...")
     
-    # Filter MAGs by minimum abundance
-    df_filtered = df[(df > min_abundance).any(axis=1)]
+    # Filter MAGs by minimum abundance (any sample above it <=> row max above it)
+    if cache is not None:
+        vals, row_max = cache.A, cache.row_max
+    else:
+        vals = df.to_numpy(np.float32, copy=False)
+        row_max = vals.max(axis=1)
+    mask = row_max > min_abundance
+    rows = vals[mask]
+    labels = df.index[mask].tolist()
     
-    # Group low-abundance MAGs
-    other_abundance = df[~df.index.isin(df_filtered.index)].sum()
+    # Group low-abundance MAGs (the complement of the same mask, no index lookup)
+    other_abundance = vals[~mask].sum(axis=0)
     
-    if not other_abundance.empty and other_abundance.sum() > 0:
-        df_filtered.loc['Other (<{:.1f}%)'.format(min_abundance)] = other_abundance
+    if other_abundance.sum() > 0:
+        rows = np.vstack([rows, other_abundance])
+        labels.append(f'Other (<{min_abundance:.1f}%)')
     
     # Create figure
+    # No constrained layout here: a long legend would leave the axes no room;
+    # the figure is saved with its measured tight bbox instead
     fig, ax = plt.subplots(figsize=(12, 7))
     
-    # Create stacked bar chart
-    df_filtered.T.plot(kind='bar', 
-                       stacked=True, 
-                       ax=ax,
-                       colormap='tab20',
-                       width=0.8)
+    # Create stacked bar chart: one ax.bar per MAG on running bottoms
+    # (colors sampled across tab20 as pandas' colormap= does)
+    x = np.arange(rows.shape[1])
+    colors = plt.get_cmap('tab20')(np.linspace(0, 1, len(rows)))
+    bottoms = np.zeros(rows.shape[1])
+    for row, label, color in zip(rows, labels, colors):
+        ax.bar(x, row, bottom=bottoms, width=0.8, color=color, label=label)
+        bottoms += row
+    ax.set_xticks(x, labels=df.columns)
+    ax.set_xlim(-0.65, x.size - 0.35)  # same padding as the pandas bar plot
     
     ax.set_title('MAG Community Composition Across Samples', 
                  fontsize=14, fontweight='bold', pad=20)
@@ -147,32 +251,35 @@ def create_composition_barplot(df, output_dir, min_abundance=0.1):
     ax.grid(axis='y', alpha=0.3, linestyle='--')
     
     plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
     
     # Save
     output_path = Path(output_dir) / 'mag_composition_barplot.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path, tight=True)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
-def create_abundance_distribution(df, output_dir):
+def create_abundance_distribution(df, output_dir, cache=None):
     """Create histogram of abundance distribution"""
     print(f"\nCreating abundance distribution plots...")
     
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5), layout='constrained')
     
-    # Flatten all abundance values
-    all_abundances = df.values.flatten()
-    all_abundances = all_abundances[all_abundances > 0]  # Remove zeros
+    # All nonzero abundance values (boolean indexing already returns a flat copy)
+    if cache is not None:
+        all_abundances = cache.nonzero
+    else:
+        A = df.to_numpy(np.float32, copy=False)
+        all_abundances = A[A > 0]
+    mean = all_abundances.mean()
+    median = np.median(all_abundances)
     
     # Histogram (linear scale)
     axes[0].hist(all_abundances, bins=50, color='steelblue', edgecolor='black', alpha=0.7)
-    axes[0].axvline(all_abundances.mean(), color='red', linestyle='--', 
-                    label=f'Mean: {all_abundances.mean():.2f}%')
-    axes[0].axvline(np.median(all_abundances), color='orange', linestyle='--',
-                    label=f'Median: {np.median(all_abundances):.2f}%')
+    axes[0].axvline(mean, color='red', linestyle='--', 
+                    label=f'Mean: {mean:.2f}%')
+    axes[0].axvline(median, color='orange', linestyle='--',
+                    label=f'Median: {median:.2f}%')
     axes[0].set_xlabel('Relative Abundance (%)', fontsize=12)
     axes[0].set_ylabel('Frequency', fontsize=12)
     axes[0].set_title('MAG Abundance Distribution (Linear)', fontsize=12, fontweight='bold')
@@ -181,10 +288,10 @@ def create_abundance_distribution(df, output_dir):
     
     # Histogram (log scale)
     axes[1].hist(all_abundances, bins=50, color='coral', edgecolor='black', alpha=0.7)
-    axes[1].axvline(all_abundances.mean(), color='red', linestyle='--', 
-                    label=f'Mean: {all_abundances.mean():.2f}%')
-    axes[1].axvline(np.median(all_abundances), color='orange', linestyle='--',
-                    label=f'Median: {np.median(all_abundances):.2f}%')
+    axes[1].axvline(mean, color='red', linestyle='--', 
+                    label=f'Mean: {mean:.2f}%')
+    axes[1].axvline(median, color='orange', linestyle='--',
+                    label=f'Median: {median:.2f}%')
     axes[1].set_xlabel('Relative Abundance (%)', fontsize=12)
     axes[1].set_ylabel('Frequency (log scale)', fontsize=12)
     axes[1].set_title('MAG Abundance Distribution (Log)', fontsize=12, fontweight='bold')
@@ -192,12 +299,9 @@ def create_abundance_distribution(df, output_dir):
     axes[1].legend()
     axes[1].grid(alpha=0.3, axis='y')
     
-    plt.tight_layout()
-    
     # Save
     output_path = Path(output_dir) / 'mag_abundance_distribution.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
@@ -206,11 +310,17 @@ def create_sample_comparison(df, output_dir):
     """Create sample-to-sample comparison plot"""
     print(f"\nCreating sample comparison plot...")
     
-    # Calculate correlation matrix
-    corr = df.T.corr()
+    # Pearson correlation between samples: standardize each sample (column)
+    # across MAGs, then one contraction over the MAG axis gives every pair;
+    # einsum works on the MAG x sample layout directly, no transposed copy
+    A = df.to_numpy(dtype=np.float64, copy=True)
+    A -= A.mean(axis=0, keepdims=True)
+    A /= A.std(axis=0, keepdims=True, ddof=0)
+    corr = np.einsum('mi,mj->ij', A, A, optimize=True) / A.shape[0]
+    corr = pd.DataFrame(corr, index=df.columns, columns=df.columns)
     
     # Create figure
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig, ax = plt.subplots(figsize=(10, 8), layout='constrained')
     
     # Create heatmap
     sns.heatmap(corr, 
@@ -226,45 +336,209 @@ def create_sample_comparison(df, output_dir):
     ax.set_title('Sample-to-Sample MAG Abundance Correlation', 
                  fontsize=14, fontweight='bold', pad=20)
     
-    plt.tight_layout()
-    
     # Save
     output_path = Path(output_dir) / 'sample_correlation.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
-def print_summary_statistics(df):
-    """Print summary statistics"""
+DETECTION_THRESHOLDS = (10, 5, 1, 0.1)
+
+@njit(parallel=True, cache=True)
+def _summarize_kernel(values, thresholds):
+    """
+    One fused pass over a MAGs x samples array (rows in parallel).
+    
+    Returns (mean, m2, min, max, nonzero_count) of the nonzero values,
+    the number of MAGs above each threshold in any sample, and the
+    per-MAG row_max and row_mean. Sums are accumulated in float64, but
+    row_max is kept in the input dtype and compared against thresholds of
+    that dtype, so a value stored as exactly 0.1 is not "above 0.1".
+    """
+    n_rows, n_cols = values.shape
+    row_max = np.empty(n_rows, dtype=values.dtype)
+    row_mean = np.empty(n_rows)
+    row_nz = np.zeros(n_rows, dtype=np.int64)
+    row_sum = np.zeros(n_rows)
+    row_sumsq = np.zeros(n_rows)
+    row_min_nz = np.full(n_rows, np.inf)
+    row_max_nz = np.full(n_rows, -np.inf)
+    hits = np.zeros((n_rows, thresholds.size), dtype=np.int64)
+    
+    for i in prange(n_rows):
+        total, hi = 0.0, -np.inf
+        for j in range(n_cols):
+            v = np.float64(values[i, j])
+            total += v
+            hi = max(hi, v)
+            if v > 0:
+                row_nz[i] += 1
+                row_sum[i] += v
+                row_sumsq[i] += v * v
+                row_min_nz[i] = min(row_min_nz[i], v)
+                row_max_nz[i] = max(row_max_nz[i], v)
+        row_max[i] = hi
+        row_mean[i] = total / n_cols
+        for t in range(thresholds.size):
+            if hi > thresholds[t]:
+                hits[i, t] = 1
+    
+    count = row_nz.sum()
+    if count == 0:  # all-zero table: no nonzero values to describe
+        return (np.nan, np.nan, np.nan, np.nan, count,
+                hits.sum(axis=0), row_max, row_mean)
+    mean = row_sum.sum() / count
+    m2 = max(row_sumsq.sum() - count * mean * mean, 0.0)
+    return (mean, m2, row_min_nz.min(), row_max_nz.max(), count,
+            hits.sum(axis=0), row_max, row_mean)
+
+def summarize_abundance(df, top_n=5):
+    """
+    Summary aggregates of an in-memory abundance table (see
+    print_summary_statistics), plus the AbundanceCache of the arrays the
+    kernel produced along the way.
+    
+    Returns:
+        (summary, cache)
+    """
+    values = df.to_numpy(np.float32, copy=False)
+    thresholds = np.asarray(DETECTION_THRESHOLDS, dtype=values.dtype)
+    mean, m2, nz_min, nz_max, count, detected, row_max, means = \
+        _summarize_kernel(values, thresholds)
+    
+    # Top MAGs by mean (partial selection; only the selected rows are sorted)
+    k = min(top_n, means.size)
+    top_idx = np.argpartition(-means, k - 1)[:k]
+    top_idx = top_idx[np.argsort(-means[top_idx], kind='stable')]
+    
+    nonzero = values[values > 0]
+    cache = AbundanceCache(A=values, row_mean=means, row_max=row_max, nonzero=nonzero)
+    
+    summary = {
+        'n_mags': len(df),
+        'n_samples': len(df.columns),
+        'mean': mean,
+        # The median needs an order statistic, so it stays outside the kernel
+        'median': np.median(nonzero),
+        'std': np.sqrt(m2 / count) if count else np.nan,
+        'min': nz_min,
+        'max': nz_max,
+        'detected': dict(zip(DETECTION_THRESHOLDS, detected.tolist())),
+        'top_means': pd.Series(means[top_idx], index=df.index[top_idx]),
+    }
+    
+    return summary, cache
+
+def stream_abundance_summary(filepath, top_n=20, chunksize=CHUNK_ROWS):
+    """
+    Summarize a CoverM table too large to load at once, in a single
+    streaming pass: peak memory is one chunk plus the top_n rows.
+    
+    Returns:
+        (summary, df_top) where summary has the keys of summarize_abundance()
+        (median is None; it cannot be computed online) and df_top holds the
+        top_n MAGs by mean abundance.
+    """
+    print(f"Streaming abundance data from: {filepath} ({chunksize:,} rows per chunk)")
+    
+    header = pd.read_csv(filepath, sep='\t', nrows=0).columns
+    ra_cols = [col for col in header if 'Relative Abundance' in col]
+    if not ra_cols:
+        print("ERROR: No 'Relative Abundance' columns found")
+        sys.exit(1)
+    samples = [col.split()[0] for col in ra_cols]
+    
+    n_mags = 0
+    nz_count, nz_sum, nz_sumsq = 0, 0.0, 0.0
+    nz_min, nz_max = np.inf, -np.inf
+    detected = dict.fromkeys(DETECTION_THRESHOLDS, 0)
+    heap = []  # min-heap of (mean, row number, MAG, values) for the top_n MAGs
+    
+    reader = pd.read_csv(filepath, sep='\t',
+                         usecols=['Genome'] + ra_cols,
+                         dtype={col: np.float32 for col in ra_cols},
+                         index_col='Genome',
+                         chunksize=chunksize)
+    for chunk in reader:
+        values = chunk[ra_cols].to_numpy()
+        
+        nonzero = values[values > 0].astype(np.float64)
+        if nonzero.size:
+            nz_count += nonzero.size
+            nz_sum += nonzero.sum()
+            nz_sumsq += np.square(nonzero).sum()
+            nz_min = min(nz_min, nonzero.min())
+            nz_max = max(nz_max, nonzero.max())
+        
+        row_max = values.max(axis=1)
+        for t in DETECTION_THRESHOLDS:
+            detected[t] += int((row_max > t).sum())
+        
+        # Only this chunk's own top_n can enter the running top_n
+        means = values.mean(axis=1)
+        k = min(top_n, means.size)
+        for i in np.argpartition(-means, k - 1)[:k]:
+            item = (float(means[i]), n_mags + i, chunk.index[i], values[i].copy())
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+        
+        n_mags += len(values)
+    
+    top = sorted(heap, key=lambda item: (-item[0], item[1]))
+    df_top = pd.DataFrame([item[3] for item in top],
+                          index=pd.Index([item[2] for item in top], name='MAG'),
+                          columns=samples)
+    
+    if nz_count:
+        nz_mean = nz_sum / nz_count
+        nz_std = np.sqrt(max(nz_sumsq / nz_count - nz_mean ** 2, 0.0))
+    else:  # all-zero table: no nonzero values to describe
+        nz_mean = nz_std = nz_min = nz_max = np.nan
+    summary = {
+        'n_mags': n_mags,
+        'n_samples': len(samples),
+        'mean': nz_mean,
+        'median': None,
+        'std': nz_std,
+        'min': nz_min,
+        'max': nz_max,
+        'detected': detected,
+        'top_means': pd.Series([item[0] for item in top[:5]], index=df_top.index[:5]),
+    }
+    
+    print(f"Streamed {n_mags} MAGs across {len(samples)} samples")
+    
+    return summary, df_top
+
+def print_summary_statistics(summary):
+    """Print summary statistics (from summarize_abundance or stream_abundance_summary)"""
     print("\n" + "="*70)
     print("  MAG ABUNDANCE SUMMARY STATISTICS")
     print("="*70)
     
     print(f"\nDataset Overview:")
-    print(f"  Total MAGs: {len(df)}")
-    print(f"  Total samples: {len(df.columns)}")
+    print(f"  Total MAGs: {summary['n_mags']}")
+    print(f"  Total samples: {summary['n_samples']}")
     
     print(f"\nAbundance Statistics (all MAGs, all samples):")
-    all_abundances = df.values.flatten()
-    all_abundances = all_abundances[all_abundances > 0]
-    
-    print(f"  Mean: {all_abundances.mean():.2f}%")
-    print(f"  Median: {np.median(all_abundances):.2f}%")
-    print(f"  Std Dev: {all_abundances.std():.2f}%")
-    print(f"  Min: {all_abundances.min():.2f}%")
-    print(f"  Max: {all_abundances.max():.2f}%")
+    print(f"  Mean: {summary['mean']:.2f}%")
+    if summary['median'] is not None:
+        print(f"  Median: {summary['median']:.2f}%")
+    else:
+        print(f"  Median: n/a (not computed when streaming)")
+    print(f"  Std Dev: {summary['std']:.2f}%")
+    print(f"  Min: {summary['min']:.2f}%")
+    print(f"  Max: {summary['max']:.2f}%")
     
     print(f"\nMAG Detection Across Samples:")
-    print(f"  MAGs with >10% abundance (any sample): {(df > 10).any(axis=1).sum()}")
-    print(f"  MAGs with >5% abundance (any sample): {(df > 5).any(axis=1).sum()}")
-    print(f"  MAGs with >1% abundance (any sample): {(df > 1).any(axis=1).sum()}")
-    print(f"  MAGs with >0.1% abundance (any sample): {(df > 0.1).any(axis=1).sum()}")
+    for threshold, n in summary['detected'].items():
+        print(f"  MAGs with >{threshold}% abundance (any sample): {n}")
     
     print(f"\nTop 5 Most Abundant MAGs (mean across samples):")
-    top5 = df.mean(axis=1).nlargest(5)
-    for i, (mag, abund) in enumerate(top5.items(), 1):
+    for i, (mag, abund) in enumerate(summary['top_means'].items(), 1):
         print(f"  {i}. {mag}: {abund:.2f}%")
     
     print("="*70)
@@ -284,29 +558,61 @@ def main():
     print(f"Minimum abundance: {args.min_abundance}%")
     print(f"Top N MAGs: {args.top_n}")
     
-    # Load data
-    df = load_abundance_data(args.input)
+    # Load data (with --stream the table is summarized in chunks instead)
+    # Derived arrays (row means/maxima, nonzero values) are computed once and
+    # handed to every plot through the cache
+    streamed = args.stream
+    if not streamed and Path(args.input).stat().st_size > LARGE_TABLE_BYTES:
+        print("Note: large input table; rerun with --stream if it does not fit in memory")
+    if streamed:
+        summary, df = stream_abundance_summary(args.input, top_n=max(args.top_n, 5))
+        cache = None
+    else:
+        df = load_abundance_data(args.input)
+        summary, cache = summarize_abundance(df)
     
     # Print statistics
-    print_summary_statistics(df)
+    print_summary_statistics(summary)
     
     # Create visualizations
     print("\nGenerating visualizations...")
     print("-" * 70)
     
-    create_abundance_heatmap(df, output_dir, top_n=args.top_n)
-    create_composition_barplot(df, output_dir, min_abundance=args.min_abundance)
-    create_abundance_distribution(df, output_dir)
-    create_sample_comparison(df, output_dir)
+    tasks = [(create_abundance_heatmap, {'top_n': args.top_n, 'fast': args.fast,
+                                         'cache': cache})]
+    if streamed:
+        print("\nTable was streamed: composition, distribution and correlation")
+        print("plots need the full table and were skipped.")
+    else:
+        tasks += [(create_composition_barplot, {'min_abundance': args.min_abundance,
+                                                'cache': cache}),
+                  (create_abundance_distribution, {'cache': cache}),
+                  (create_sample_comparison, {})]
+    
+    if args.jobs <= 1:
+        # Default: render in-process, sharing df and the cache directly
+        for fn, kwargs in tasks:
+            fn(df, output_dir, **kwargs)
+    else:
+        # Each worker re-imports matplotlib/numba and receives a pickled copy of
+        # df and the cache, so this only pays off when the renders are heavy.
+        # Workers are spawned, not forked: the numba kernel has already started
+        # its thread pool, and a forked copy of that (TBB layer) hangs on exit.
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(tasks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(fn, df, output_dir, **kwargs) for fn, kwargs in tasks]
+            for future in as_completed(futures):
+                future.result()
     
     print("\n" + "="*70)
     print("  Visualization Complete!")
     print("="*70)
     print(f"\nOutput files saved to: {output_dir}")
     print("  - mag_abundance_heatmap.pdf/png")
-    print("  - mag_composition_barplot.pdf/png")
-    print("  - mag_abundance_distribution.pdf/png")
-    print("  - sample_correlation.pdf/png")
+    if not streamed:
+        print("  - mag_composition_barplot.pdf/png")
+        print("  - mag_abundance_distribution.pdf/png")
+        print("  - sample_correlation.pdf/png")
     print("\n✓ All visualizations generated successfully!")
 
 if __name__ == '__main__':
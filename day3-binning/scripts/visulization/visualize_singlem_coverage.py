@@ -7,13 +7,27 @@ Usage: python visualize_singlem_coverage.py --input singlem_results/found_mags.t
 """
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # file output only; also safe in worker processes
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import sys
 
+try:
+    import pyarrow  # noqa: F401  (enables pandas' multithreaded pyarrow CSV engine)
+    CSV_ENGINE = 'pyarrow'
+except ImportError:  # fall back to pandas' C parser
+    CSV_ENGINE = 'c'
+
+# Heatmaps with more cells than this skip per-cell annotation and grid lines
+FAST_HEATMAP_CELLS = 2000
+# ... and above this the cells are drawn without value labels
+ANNOT_MAX_CELLS = 500
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description='Visualize MAG coverage from SingleM results'
@@ -33,15 +47,38 @@ def parse_arguments():
         default='figures',
         help='Output directory for figures (default: figures)'
     )
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help='Draw heatmaps as a single image without cell annotations '
+             '(automatic above %d cells)' % FAST_HEATMAP_CELLS
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Worker processes for rendering figures (default: 1, render in '
+             'this process; only worth raising for very large tables)'
+    )
     
     return parser.parse_args()
 
+def save_figure(fig, output_path):
+    """
+    Save fig as PDF (output_path) and PNG, 300 dpi.
+    
+    Figures are created with layout='constrained', so the saves need no
+    bbox_inches='tight' measuring pass (nor a tight_layout call).
+    """
+    fig.savefig(output_path, dpi=300)
+    fig.savefig(output_path.with_suffix('.png'), dpi=300)
+
 def load_singlem_data(filepath):
     """Load and parse SingleM results"""
     print(f"Loading SingleM data from: {filepath}")
     
     try:
-        df = pd.read_csv(filepath, sep='\t')
+        df = pd.read_csv(filepath, sep='\t', engine=CSV_ENGINE)
     except FileNotFoundError:
         print(f"ERROR: File not found: {filepath}")
         sys.exit(1)
@@ -50,33 +87,71 @@ def load_singlem_data(filepath):
     
     return df
 
-def create_coverage_heatmap(df, output_dir):
-    """Create MAG coverage heatmap across samples"""
+def annotate_cells(ax, values, fmt):
+    """Write cell values onto a seaborn heatmap, in a contrasting color"""
+    mesh = ax.collections[0]
+    rgb = mesh.cmap(mesh.norm(values))[..., :3]
+    dark = rgb @ np.array([0.299, 0.587, 0.114]) < 0.408
+    for (i, j), v in np.ndenumerate(values):
+        if not np.isnan(v):
+            ax.text(j + 0.5, i + 0.5, format(v, fmt), ha='center', va='center',
+                    fontsize=8, color='white' if dark[i, j] else 'black')
+
+def draw_raster_heatmap(fig, ax, data, cmap, cbar_label, vmin=None, vmax=None):
+    """Heatmap as one image: no per-cell text or grid lines (for large matrices)"""
+    im = ax.imshow(data.to_numpy(), cmap=cmap, vmin=vmin, vmax=vmax,
+                   aspect='auto', interpolation='nearest')
+    ax.set_xticks(range(data.shape[1]), labels=data.columns)
+    ax.set_yticks(range(data.shape[0]), labels=data.index)
+    fig.colorbar(im, ax=ax, label=cbar_label)
+
+def pivot_mean_coverage(df):
+    """
+    genome x sample table of mean coverage (as pivot_table(aggfunc='mean')).
+    
+    Both keys are factorized and the coverages scattered into a dense
+    array, so no MultiIndex or groupby is built. Missing pairs are NaN.
+    """
+    gi, genomes = pd.factorize(df['genome'], sort=True)
+    si, samples = pd.factorize(df['sample'], sort=True)
+    cov = df['coverage'].to_numpy(np.float32)
+    
+    # Rows with a missing key or coverage do not contribute (as in pivot_table)
+    keep = (gi >= 0) & (si >= 0) & ~np.isnan(cov)
+    gi, si, cov = gi[keep], si[keep], cov[keep]
+    
+    sums = np.zeros((len(genomes), len(samples)), dtype=np.float32)
+    counts = np.zeros_like(sums)
+    np.add.at(sums, (gi, si), cov)
+    np.add.at(counts, (gi, si), 1)
+    means = np.divide(sums, counts, out=np.full_like(sums, np.nan), where=counts > 0)
+    
+    return pd.DataFrame(means,
+                        index=pd.Index(genomes, name='genome'),
+                        columns=pd.Index(samples, name='sample'))
+
+def create_coverage_heatmap(pivot, output_dir, fast=False):
+    """Create MAG coverage heatmap across samples (from the genome x sample pivot)"""
     print(f"\nCreating coverage heatmap...")
     
-    # Create pivot table
-    if 'genome' in df.columns and 'sample' in df.columns and 'coverage' in df.columns:
-        pivot = df.pivot_table(values='coverage', 
-                               index='genome', 
-                               columns='sample', 
-                               aggfunc='mean')
-    else:
-        print("ERROR: Expected columns not found. Need: genome, sample, coverage")
-        return
-    
     # Create figure
-    fig, ax = plt.subplots(figsize=(12, 10))
-    
-    # Create heatmap
-    sns.heatmap(pivot, 
-                annot=True, 
-                fmt='.1f', 
-                cmap='RdYlGn',
-                vmin=0, vmax=100,
-                cbar_kws={'label': 'Coverage (%)'},
-                linewidths=0.5,
-                linecolor='gray',
-                ax=ax)
+    fig, ax = plt.subplots(figsize=(12, 10), layout='constrained')
+    
+    # Create heatmap (large matrices: one raster image instead of per-cell artists)
+    if fast or pivot.size > FAST_HEATMAP_CELLS:
+        draw_raster_heatmap(fig, ax, pivot, 'RdYlGn', 'Coverage (%)', vmin=0, vmax=100)
+    else:
+        sns.heatmap(pivot, 
+                    annot=False, 
+                    cmap='RdYlGn',
+                    vmin=0, vmax=100,
+                    cbar_kws={'label': 'Coverage (%)'},
+                    linewidths=0.5,
+                    linecolor='gray',
+                    ax=ax)
+        # Value labels only where they are legible
+        if pivot.size < ANNOT_MAX_CELLS:
+            annotate_cells(ax, pivot.to_numpy(), '.1f')
     
     ax.set_title('MAG Coverage Across Samples (SingleM)', 
                  fontsize=14, fontweight='bold', pad=20)
@@ -87,23 +162,40 @@ def create_coverage_heatmap(df, output_dir):
     plt.xticks(rotation=45, ha='right')
     plt.yticks(rotation=0)
     
-    plt.tight_layout()
-    
     # Save
     output_path = Path(output_dir) / 'mag_coverage_heatmap.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
-    
-    return pivot
 
-def create_coverage_distribution(df, output_dir):
-    """Create coverage distribution plots"""
+def box_stats(values):
+    """
+    Per-column box plot statistics of a 2-D array (NaN = missing), for Axes.bxp.
+    
+    Quartiles for all columns come from one nanquantile call; whiskers and
+    fliers follow Matplotlib's boxplot default (1.5 x IQR).
+    """
+    q1, med, q3 = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0)
+    iqr = q3 - q1
+    lo, hi = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    
+    with np.errstate(invalid='ignore'):
+        inside = (values >= lo) & (values <= hi)
+        outside = ~inside & ~np.isnan(values)
+    whislo = np.nanmin(np.where(inside, values, np.nan), axis=0)
+    whishi = np.nanmax(np.where(inside, values, np.nan), axis=0)
+    
+    return [{'med': med[j], 'q1': q1[j], 'q3': q3[j],
+             'whislo': whislo[j], 'whishi': whishi[j],
+             'fliers': values[outside[:, j], j]}
+            for j in range(values.shape[1])]
+
+def create_coverage_distribution(df, output_dir, pivot=None):
+    """Create coverage distribution plots (per-sample boxes from the genome x sample pivot)"""
     print(f"\nCreating coverage distribution plots...")
     
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5), layout='constrained')
     
     # Extract coverage values
     coverage_values = df['coverage'].values
@@ -121,22 +213,19 @@ def create_coverage_distribution(df, output_dir):
     axes[0].grid(alpha=0.3, axis='y')
     
     # Box plot per sample
-    if 'sample' in df.columns:
-        sample_data = [df[df['sample'] == s]['coverage'].values 
-                      for s in df['sample'].unique()]
-        axes[1].boxplot(sample_data, labels=df['sample'].unique())
+    if pivot is not None:
+        # Box statistics precomputed for all samples at once
+        axes[1].bxp(box_stats(pivot.to_numpy()))
+        axes[1].set_xticks(range(1, pivot.shape[1] + 1), labels=pivot.columns)
         axes[1].set_xlabel('Sample', fontsize=12)
         axes[1].set_ylabel('Coverage (%)', fontsize=12)
         axes[1].set_title('Coverage Distribution per Sample', fontsize=12, fontweight='bold')
         axes[1].grid(alpha=0.3, axis='y')
         plt.setp(axes[1].xaxis.get_majorticklabels(), rotation=45, ha='right')
     
-    plt.tight_layout()
-    
     # Save
     output_path = Path(output_dir) / 'mag_coverage_distribution.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
@@ -149,13 +238,15 @@ def create_detection_matrix(pivot, output_dir):
     threshold = 50
     binary = (pivot > threshold).astype(int)
     
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig, ax = plt.subplots(figsize=(10, 8), layout='constrained')
+    
+    # Cell grid lines only on small matrices (one line segment per cell edge)
+    grid = {'linewidths': 0.5, 'linecolor': 'gray'} if binary.size <= FAST_HEATMAP_CELLS else {}
     
     sns.heatmap(binary, 
                 cmap=['white', 'darkgreen'],
                 cbar_kws={'label': 'Detected (>50% coverage)', 'ticks': [0, 1]},
-                linewidths=0.5,
-                linecolor='gray',
+                **grid,
                 ax=ax)
     
     ax.set_title(f'MAG Detection Matrix (>{threshold}% coverage)', 
@@ -166,39 +257,35 @@ def create_detection_matrix(pivot, output_dir):
     plt.xticks(rotation=45, ha='right')
     plt.yticks(rotation=0)
     
-    plt.tight_layout()
-    
     # Save
     output_path = Path(output_dir) / 'mag_detection_matrix.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
 
-def create_mag_quality_scatter(df, output_dir):
-    """Create scatter plot of MAG coverage vs detection frequency"""
+def create_mag_quality_scatter(pivot, output_dir):
+    """Create scatter plot of MAG coverage vs detection frequency (from the pivot)"""
     print(f"\nCreating MAG quality scatter plot...")
     
-    # Calculate mean coverage and detection frequency per MAG
-    mag_stats = df.groupby('genome').agg({
-        'coverage': 'mean',
-        'sample': 'count'
-    }).reset_index()
-    mag_stats.columns = ['MAG', 'Mean_Coverage', 'Detection_Frequency']
+    # Mean coverage and detection frequency per MAG, straight from the array
+    values = pivot.to_numpy()
+    detected = ~np.isnan(values)
+    mean_cov = np.nanmean(values, axis=1)
+    detection_freq = detected.sum(axis=1)
     
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig, ax = plt.subplots(figsize=(10, 8), layout='constrained')
     
-    scatter = ax.scatter(mag_stats['Detection_Frequency'], 
-                        mag_stats['Mean_Coverage'],
+    scatter = ax.scatter(detection_freq, 
+                        mean_cov,
                         s=100, 
                         alpha=0.6,
-                        c=mag_stats['Mean_Coverage'],
+                        c=mean_cov,
                         cmap='RdYlGn',
                         edgecolors='black')
     
     # Add threshold lines
-    n_samples = df['sample'].nunique()
+    n_samples = pivot.shape[1]
     ax.axhline(y=90, color='green', linestyle='--', alpha=0.5, label='High coverage (90%)')
     ax.axhline(y=50, color='orange', linestyle='--', alpha=0.5, label='Medium coverage (50%)')
     ax.axvline(x=n_samples, color='blue', linestyle='--', alpha=0.5, label='All samples')
@@ -210,12 +297,10 @@ def create_mag_quality_scatter(df, output_dir):
     ax.grid(alpha=0.3)
     
     plt.colorbar(scatter, ax=ax, label='Mean Coverage (%)')
-    plt.tight_layout()
     
     # Save
     output_path = Path(output_dir) / 'mag_quality_scatter.pdf'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.savefig(output_path.with_suffix('.png'), dpi=300, bbox_inches='tight')
+    save_figure(fig, output_path)
     
     print(f"  ✓ Saved: {output_path}")
     plt.close()
@@ -247,21 +332,28 @@ def print_coverage_summary(df):
     print(f"  Medium coverage (50-90%): {med_cov} ({med_cov/len(df)*100:.1f}%)")
     print(f"  Low coverage (<50%): {low_cov} ({low_cov/len(df)*100:.1f}%)")
     
-    # Per-MAG statistics
-    mag_coverage = df.groupby('genome')['coverage'].mean().sort_values(ascending=False)
+    # Per-MAG statistics (mean coverage and detection count in one pass)
+    mag_stats = (df.groupby('genome', observed=True, sort=False)
+                   .agg(mean=('coverage', 'mean'), n=('sample', 'count')))
+    
+    # Top/bottom 5 by partial selection; only those rows are sorted (descending)
+    means = mag_stats['mean'].to_numpy()
+    k = min(5, means.size)
+    top_idx = np.argpartition(-means, k - 1)[:k]
+    top_idx = top_idx[np.argsort(-means[top_idx], kind='stable')]
+    bottom_idx = np.argpartition(means, k - 1)[:k]
+    bottom_idx = bottom_idx[np.argsort(-means[bottom_idx], kind='stable')]
     
     print(f"\nTop 5 Most Covered MAGs:")
-    for i, (mag, cov) in enumerate(mag_coverage.head(5).items(), 1):
-        n_samples = len(df[df['genome'] == mag])
+    for i, (mag, cov, n_samples) in enumerate(mag_stats.iloc[top_idx].itertuples(), 1):
         print(f"  {i}. {mag}: {cov:.1f}% (detected in {n_samples} samples)")
     
     print(f"\nBottom 5 Least Covered MAGs:")
-    for i, (mag, cov) in enumerate(mag_coverage.tail(5).items(), 1):
-        n_samples = len(df[df['genome'] == mag])
+    for i, (mag, cov, n_samples) in enumerate(mag_stats.iloc[bottom_idx].itertuples(), 1):
         print(f"  {i}. {mag}: {cov:.1f}% (detected in {n_samples} samples)")
     
     # Detection frequency
-    detection_freq = df.groupby('genome')['sample'].count().sort_values(ascending=False)
+    detection_freq = mag_stats['n']
     total_samples = df['sample'].nunique()
     
     print(f"\nMAG Detection Frequency:")
@@ -294,13 +386,30 @@ def main():
     print("\nGenerating visualizations...")
     print("-" * 70)
     
-    pivot = create_coverage_heatmap(df, output_dir)
-    create_coverage_distribution(df, output_dir)
+    # Build the genome x sample pivot once; every matrix-shaped plot reuses it
+    if {'genome', 'sample', 'coverage'}.issubset(df.columns):
+        pivot = pivot_mean_coverage(df)
+    else:
+        print("ERROR: Expected columns not found. Need: genome, sample, coverage")
+        pivot = None
     
+    tasks = [(create_coverage_distribution, (df, output_dir, pivot), {})]
     if pivot is not None:
-        create_detection_matrix(pivot, output_dir)
-    
-    create_mag_quality_scatter(df, output_dir)
+        tasks += [(create_coverage_heatmap, (pivot, output_dir), {'fast': args.fast}),
+                  (create_detection_matrix, (pivot, output_dir), {}),
+                  (create_mag_quality_scatter, (pivot, output_dir), {})]
+    
+    if args.jobs <= 1:
+        # Default: render in-process, sharing df and the pivot directly
+        for fn, fn_args, kwargs in tasks:
+            fn(*fn_args, **kwargs)
+    else:
+        # Each worker re-imports matplotlib/seaborn and receives a pickled copy
+        # of its inputs, so this only pays off when the renders are heavy
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(tasks))) as executor:
+            futures = [executor.submit(fn, *fn_args, **kwargs) for fn, fn_args, kwargs in tasks]
+            for future in as_completed(futures):
+                future.result()
     
     print("\n" + "="*70)
     print("  Visualization Complete!")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -7,8 +8,8 @@ import seaborn as sns
 clusters = pd.read_csv('dereplicated_genomes/data_tables/Cdb.csv')
 winners = pd.read_csv('dereplicated_genomes/data_tables/Widb.csv')
 
-# Count genomes per cluster
-cluster_sizes = clusters['secondary_cluster'].value_counts()
+# Count genomes per cluster (plain array for the summary stats below)
+cluster_sizes = clusters['secondary_cluster'].value_counts().to_numpy()
 
 print("="*60)
 print("  Dereplication Summary")
@@ -31,8 +32,8 @@ axes[0].set_title('Genome Cluster Size Distribution')
 axes[0].grid(alpha=0.3, axis='y')
 
 # Pie chart: Singletons vs Multi-member
-singletons = (cluster_sizes == 1).sum()
-multi = (cluster_sizes > 1).sum()
+singletons = int(np.count_nonzero(cluster_sizes == 1))
+multi = cluster_sizes.size - singletons
 axes[1].pie([singletons, multi], 
             labels=['Unique genomes', 'Redundant groups'],
             autopct='%1.1f%%',
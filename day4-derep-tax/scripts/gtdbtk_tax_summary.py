@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import pandas as pd
-from collections import Counter
 
 # Read GTDB-Tk results
 df = pd.read_csv('gtdbtk_output/classify/gtdbtk.bac120.summary.tsv', sep='\t')
@@ -10,20 +9,20 @@ print("  GTDB-Tk Classification Summary")
 print("="*60)
 print(f"\nTotal genomes classified: {len(df)}")
 
-# Extract taxonomic levels
+# Extract taxonomic levels (all seven ranks in one regex pass)
 tax_levels = ['domain', 'phylum', 'class', 'order', 'family', 'genus', 'species']
 prefixes = ['d__', 'p__', 'c__', 'o__', 'f__', 'g__', 's__']
 
-for level, prefix in zip(tax_levels, prefixes):
-    taxa = [tax.split(prefix)[1].split(';')[0] 
-            for tax in df['classification'] if prefix in tax]
-    unique = len(set(taxa))
+pattern = ';'.join(f'{prefix}([^;]*)' for prefix in prefixes)
+tax_df = df['classification'].str.extract(pattern)
+tax_df.columns = tax_levels
+
+for level, unique in tax_df.nunique().items():
     print(f"  {level.capitalize()}: {unique} unique")
 
 # Top 5 phyla
 print("\nTop 5 Phyla:")
-phyla = [tax.split('p__')[1].split(';')[0] for tax in df['classification']]
-for phylum, count in Counter(phyla).most_common(5):
+for phylum, count in tax_df['phylum'].value_counts().head(5).items():
     print(f"  {phylum}: {count} genomes")
 
 # ANI distribution
@@ -1,11 +1,41 @@
 #!/usr/bin/env python3
 # compare_specialized_functions.py
 
+import os
+import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import glob
 
+# Stream antiSMASH JSON when ijson is installed; otherwise load it whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+def list_dir(path):
+    """Map entry names to paths for one directory ({} if it does not exist)"""
+    try:
+        with os.scandir(path) as it:
+            return {entry.name: entry.path for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+
+def count_rows(path):
+    """Count data rows in a tab-separated table without parsing it"""
+    with open(path, 'rb') as f:
+        return max(0, sum(1 for line in f if line.strip()) - 1)
+
+def count_bgcs(path):
+    """Count antiSMASH regions across all records"""
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            return sum(1 for _ in ijson.items(f, 'records.item.areas.item'))
+    with open(path) as f:
+        data = json.load(f)
+    return sum(len(record.get('areas', [])) for record in data['records'])
+
 # Collect results from multiple genomes
 genomes = []
 
@@ -21,31 +51,28 @@ for genome_dir in glob.glob('specialized_analysis/*'):
         'CRISPR': 0
     }
     
+    # One directory listing per (sub)directory instead of an exists() per file
+    entries = list_dir(genome_dir)
+    antismash_dir = list_dir(entries['antismash']) if 'antismash' in entries else {}
+    dbcan_dir = list_dir(entries['dbcan_output']) if 'dbcan_output' in entries else {}
+    virsorter_dir = (list_dir(entries['virsorter2_output'])
+                     if 'virsorter2_output' in entries else {})
+    
     # Count BGCs
-    antismash_json = f'{genome_dir}/antismash/genome.json'
-    if os.path.exists(antismash_json):
-        with open(antismash_json) as f:
-            data = json.load(f)
-            for record in data['records']:
-                result['BGCs'] += len(record.get('areas', []))
+    if 'genome.json' in antismash_dir:
+        result['BGCs'] = count_bgcs(antismash_dir['genome.json'])
     
     # Count AMR
-    rgi_file = f'{genome_dir}/rgi_output.txt'
-    if os.path.exists(rgi_file):
-        rgi = pd.read_csv(rgi_file, sep='\t')
-        result['AMR_genes'] = len(rgi)
+    if 'rgi_output.txt' in entries:
+        result['AMR_genes'] = count_rows(entries['rgi_output.txt'])
     
     # Count CAZymes
-    dbcan_file = f'{genome_dir}/dbcan_output/overview.txt'
-    if os.path.exists(dbcan_file):
-        dbcan = pd.read_csv(dbcan_file, sep='\t')
-        result['CAZymes'] = len(dbcan)
+    if 'overview.txt' in dbcan_dir:
+        result['CAZymes'] = count_rows(dbcan_dir['overview.txt'])
     
     # Count prophages
-    virsorter_file = f'{genome_dir}/virsorter2_output/final-viral-boundary.tsv'
-    if os.path.exists(virsorter_file):
-        virsorter = pd.read_csv(virsorter_file, sep='\t')
-        result['Prophages'] = len(virsorter)
+    if 'final-viral-boundary.tsv' in virsorter_dir:
+        result['Prophages'] = count_rows(virsorter_dir['final-viral-boundary.tsv'])
     
     genomes.append(result)
 
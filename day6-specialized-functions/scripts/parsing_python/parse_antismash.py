@@ -4,32 +4,46 @@
 import json
 import pandas as pd
 
-# Read antiSMASH JSON
-with open('antismash_output/genome1/genome1.json') as f:
-    data = json.load(f)
+# Stream antiSMASH JSON when ijson is installed; otherwise load it whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+def iter_regions(path):
+    """Yield antiSMASH regions across all records"""
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'records.item.areas.item')
+        return
+    with open(path) as f:
+        data = json.load(f)
+    for record in data['records']:
+        yield from record.get('areas', [])
 
+# Read antiSMASH JSON
 bgcs = []
-for record in data['records']:
-    for region in record.get('areas', []):
-        bgc = {
-            'genome': 'genome1',
-            'region': region['region_number'],
-            'type': ','.join(region['products']),
-            'start': region['start'],
-            'end': region['end'],
-            'length': region['end'] - region['start']
-        }
-        bgcs.append(bgc)
+for region in iter_regions('antismash_output/genome1/genome1.json'):
+    bgc = {
+        'genome': 'genome1',
+        'region': region['region_number'],
+        'type': ','.join(region['products']),
+        'start': region['start'],
+        'end': region['end']
+    }
+    bgcs.append(bgc)
 
 df = pd.DataFrame(bgcs)
+df['length'] = df['end'].to_numpy() - df['start'].to_numpy()
+df['type'] = df['type'].astype('category')
 
 print("="*60)
 print("  antiSMASH BGC Summary")
 print("="*60)
 print(f"Total BGCs: {len(df)}")
 print(f"\nBGC Types:")
-for bgc_type in df['type'].value_counts().head(10).items():
-    print(f"  {bgc_type[0]}: {bgc_type[1]}")
+for bgc_type, count in df['type'].value_counts().head(10).items():
+    print(f"  {bgc_type}: {count}")
 
 df.to_csv('bgc_summary.csv', index=False)
 print(f"\n✓ BGC summary saved: bgc_summary.csv")
@@ -12,24 +12,19 @@ print("="*60)
 print(f"Total CAZymes: {len(df)}")
 
 # Count by family
-families = []
-for index, row in df.iterrows():
-    if pd.notna(row['HMMER']):
-        families.append(row['HMMER'].split('(')[0])
-
-from collections import Counter
-family_counts = Counter(families)
+families = df['HMMER'].dropna().str.split('(', n=1).str[0]
+family_counts = families.value_counts()
 
 print(f"\nTop 10 CAZyme Families:")
-for family, count in family_counts.most_common(10):
+for family, count in family_counts.head(10).items():
     print(f"  {family}: {count}")
 
 # Cellulose degradation capability
 cellulose_families = ['GH5', 'GH6', 'GH7', 'GH9', 'GH45']
-cellulose_cazymes = sum([family_counts.get(f, 0) for f in cellulose_families])
+cellulose_cazymes = family_counts.reindex(cellulose_families, fill_value=0).sum()
 print(f"\nCellulose degradation genes: {cellulose_cazymes}")
 
 # Starch degradation
 starch_families = ['GH13', 'GH14', 'GH15', 'GH31']
-starch_cazymes = sum([family_counts.get(f, 0) for f in starch_families])
+starch_cazymes = family_counts.reindex(starch_families, fill_value=0).sum()
 print(f"Starch degradation genes: {starch_cazymes}")
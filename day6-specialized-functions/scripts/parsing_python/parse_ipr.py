@@ -3,12 +3,19 @@
 
 import pandas as pd
 
-# Read InterProScan TSV
+try:
+    import pyarrow  # noqa: F401  (enables Arrow-backed string columns)
+    STR_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STR_DTYPE = 'string'
+
+# Read InterProScan TSV (only the protein ID and InterPro description are used).
+# The C parser is kept on purpose: matches without an InterPro entry omit the
+# trailing InterPro columns, and those ragged rows must read as missing values.
 df = pd.read_csv('interproscan_output.tsv', sep='\t', header=None,
-                 names=['protein_id', 'md5', 'length', 'database', 
-                        'signature_accession', 'signature_description',
-                        'start', 'end', 'score', 'status', 'date',
-                        'interpro_accession', 'interpro_description'])
+                 usecols=[0, 12],
+                 names=['protein_id', 'interpro_description'],
+                 dtype=STR_DTYPE)
 
 print("="*60)
 print("  InterProScan Domain Summary")
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # parse_rgi.py
 
+import re
 import pandas as pd
 
 # Read RGI results
@@ -23,7 +24,10 @@ for mech in df['Resistance Mechanism'].value_counts().items():
 
 # Critical AMR genes
 critical = ['mcr-1', 'NDM', 'KPC', 'VIM', 'OXA-48']
+pattern = '(' + '|'.join(map(re.escape, critical)) + ')'
+hits = df['Best_Hit_ARO'].str.extract(pattern, flags=re.IGNORECASE, expand=False)
+hit_counts = hits.dropna().str.lower().value_counts()
 for gene in critical:
-    hits = df[df['Best_Hit_ARO'].str.contains(gene, case=False, na=False)]
-    if len(hits) > 0:
-        print(f"\n⚠️  CRITICAL: {gene} detected ({len(hits)} hits)")
+    n_hits = hit_counts.get(gene.lower(), 0)
+    if n_hits > 0:
+        print(f"\n⚠️  CRITICAL: {gene} detected ({n_hits} hits)")
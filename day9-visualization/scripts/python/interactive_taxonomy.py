@@ -1,6 +1,15 @@
+import os
+import hashlib
 import pandas as pd
 import numpy as np
-import plotly.express as px
+import plotly.graph_objects as go
+
+# Families drawn per Order; the rest are pooled into one "Other" wedge
+MAX_LEAVES_PER_PARENT = 50
+
+HTML_PATH = "taxonomy_sunburst_toy.html"
+# Sidecar holding the hash of the input + settings the HTML was built from
+HASH_PATH = HTML_PATH + ".sha"
 
 # ============================
 # TOY DATA: full lineage taxonomy table
@@ -16,18 +25,76 @@ rows = [
     ("Bacteria","Cyanobacteria","Cyanobacteriia","Synechococcales","Synechococcaceae"),
 ]
 
-taxonomy_full = pd.DataFrame(rows, columns=["Domain","Phylum","Class","Order","Family"])
+tax_path = ["Domain", "Phylum", "Class", "Order", "Family"]
+
+# Lineage columns as categoricals: shared labels, integer group keys
+taxonomy_full = pd.DataFrame(rows, columns=tax_path).astype({c: "category" for c in tax_path})
 taxonomy_full["Abundance"] = np.random.randint(50, 400, size=len(taxonomy_full))
 
-# Sunburst
-fig = px.sunburst(
-    taxonomy_full,
-    path=["Domain", "Phylum", "Class", "Order", "Family"],
-    values="Abundance",
-    title="Taxonomic Composition - Interactive Sunburst (Toy Data)"
-)
+# Roll up to one row per full lineage before plotting
+taxonomy_agg = taxonomy_full.groupby(tax_path, as_index=False, sort=False, observed=True)["Abundance"].sum()
+
+# Keep the most abundant leaves under each parent so the number of
+# sunburst wedges stays bounded on deep, real-world taxonomy tables
+parent_path = tax_path[:-1]
+taxonomy_agg = taxonomy_agg.sort_values("Abundance", ascending=False, kind="stable")
+leaf_rank = taxonomy_agg.groupby(parent_path, sort=False, observed=True).cumcount()
+is_other = leaf_rank >= MAX_LEAVES_PER_PARENT
+if is_other.any():
+    other = (taxonomy_agg[is_other]
+             .groupby(parent_path, as_index=False, sort=False, observed=True)["Abundance"].sum()
+             .assign(**{tax_path[-1]: "Other"}))
+    taxonomy_agg = pd.concat([taxonomy_agg[~is_other], other[tax_path + ["Abundance"]]],
+                             ignore_index=True)
+
+# Rebuild the HTML only when the input table or plot settings changed
+width, height = 800, 800
+settings = (MAX_LEAVES_PER_PARENT, width, height)
+content_hash = hashlib.sha1(
+    pd.util.hash_pandas_object(taxonomy_full, index=True).to_numpy().tobytes()
+    + repr(settings).encode()
+).hexdigest()
+
+previous_hash = None
+if os.path.exists(HTML_PATH) and os.path.exists(HASH_PATH):
+    with open(HASH_PATH) as f:
+        previous_hash = f.read().strip()
+
+if previous_hash == content_hash:
+    print(f"{HTML_PATH} is up to date; skipping render")
+else:
+    # Sunburst nodes, one level at a time: id = "/"-joined lineage,
+    # parent = id minus its last segment, value = summed abundance
+    levels = []
+    for depth in range(1, len(tax_path) + 1):
+        cols = tax_path[:depth]
+        level = taxonomy_agg.groupby(cols, as_index=False, sort=False, observed=True)["Abundance"].sum()
+        ids = level[cols[0]].astype(str)
+        for col in cols[1:]:
+            ids = ids + "/" + level[col].astype(str)
+        levels.append(pd.DataFrame({
+            "ids": ids,
+            "labels": level[cols[-1]].astype(str),
+            "parents": ids.str.rsplit("/", n=1).str[0] if depth > 1 else "",
+            "values": level["Abundance"],
+        }))
+    nodes = pd.concat(levels, ignore_index=True)
 
-fig.update_layout(width=800, height=800)
-fig.write_html("taxonomy_sunburst_toy.html")
-fig.show()
+    # Sunburst
+    fig = go.Figure(go.Sunburst(
+        ids=nodes["ids"],
+        labels=nodes["labels"],
+        parents=nodes["parents"],
+        values=nodes["values"],
+        branchvalues="total"
+    ))
 
+    fig.update_layout(
+        title="Taxonomic Composition - Interactive Sunburst (Toy Data)",
+        width=width,
+        height=height
+    )
+    fig.write_html(HTML_PATH)
+    with open(HASH_PATH, "w") as f:
+        f.write(content_hash + "\n")
+    fig.show()
@@ -1,4 +1,4 @@
-import plotly.graph_objects as go
+import plotly.express as px
 import pandas as pd
 import numpy as np
 
@@ -6,37 +6,29 @@ import numpy as np
 # Create TOY NMDS data
 # ============================
 
-np.random.seed(42)
+rng = np.random.default_rng(42)
 
 treatments = ['FL_Low', 'FL_High', 'PA_Low', 'PA_High']
 samples_per_group = 8
 
-data = []
+# Cluster centre (NMDS1, NMDS2) per treatment, for structured separation
+means = np.array([
+    [-1.5,  1.5],   # FL_Low
+    [ 1.5,  1.5],   # FL_High
+    [-1.5, -1.5],   # PA_Low
+    [ 1.5, -1.5],   # PA_High
+])
 
-for t in treatments:
-    for i in range(samples_per_group):
-        
-        # Create structured separation
-        if t == 'FL_Low':
-            x = np.random.normal(-1.5, 0.3)
-            y = np.random.normal(1.5, 0.3)
-        elif t == 'FL_High':
-            x = np.random.normal(1.5, 0.3)
-            y = np.random.normal(1.5, 0.3)
-        elif t == 'PA_Low':
-            x = np.random.normal(-1.5, 0.3)
-            y = np.random.normal(-1.5, 0.3)
-        else:  # PA_High
-            x = np.random.normal(1.5, 0.3)
-            y = np.random.normal(-1.5, 0.3)
-        
-        sample_name = f"{t}_S{i+1}"
-        data.append([sample_name, t, x, y])
+treatment = np.repeat(treatments, samples_per_group)
+coords = rng.normal(np.repeat(means, samples_per_group, axis=0), 0.3)
 
-ordination = pd.DataFrame(
-    data,
-    columns=['Sample', 'Treatment', 'NMDS1', 'NMDS2']
-)
+ordination = pd.DataFrame({
+    'Sample': [f"{t}_S{i+1}" for t, i in
+               zip(treatment, np.tile(np.arange(samples_per_group), len(treatments)))],
+    'Treatment': pd.Categorical(treatment, categories=treatments),
+    'NMDS1': coords[:, 0],
+    'NMDS2': coords[:, 1],
+})
 
 print("Toy NMDS preview:")
 print(ordination.head())
@@ -46,25 +38,23 @@ print(ordination.head())
 # Interactive NMDS Plot
 # ============================
 
-fig = go.Figure()
+fig = px.scatter(
+    ordination,
+    x='NMDS1',
+    y='NMDS2',
+    color='Treatment',
+    hover_name='Sample',
+    render_mode='webgl'  # Scattergl: one canvas instead of an SVG node per marker
+)
 
-for treatment in ordination['Treatment'].unique():
-    
-    subset = ordination[ordination['Treatment'] == treatment]
-    
-    fig.add_trace(go.Scatter(
-        x=subset['NMDS1'],
-        y=subset['NMDS2'],
-        mode='markers+text',
-        name=treatment,
-        text=subset['Sample'],
-        textposition='top center',
-        marker=dict(
-            size=12,
-            line=dict(width=2, color='DarkSlateGrey')
-        ),
-        hovertemplate='<b>%{text}</b><br>NMDS1: %{x:.2f}<br>NMDS2: %{y:.2f}<extra></extra>'
-    ))
+# Sample labels are shown on hover only; WebGL text labels scale poorly
+fig.update_traces(
+    marker=dict(
+        size=12,
+        line=dict(width=2, color='DarkSlateGrey')
+    ),
+    hovertemplate='<b>%{hovertext}</b><br>NMDS1: %{x:.2f}<br>NMDS2: %{y:.2f}<extra></extra>'
+)
 
 fig.update_layout(
     title='NMDS Ordination - Interactive (Toy Data)',